@@ -0,0 +1,6 @@
+"""
+Shared infrastructure for the P2P/OTC rate monitors in this directory.
+
+The monitor scripts (p2p_bot.py and the scripts under binance/) import from this
+package instead of each carrying their own copy of the browser handling.
+"""
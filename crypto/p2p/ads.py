@@ -0,0 +1,24 @@
+"""
+Parsed advertisement records shared by every fetcher backend.
+"""
+import re
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Ad:
+    """One advertisement row; only `price` is guaranteed to be filled in."""
+    price: float
+    advertiser: str = None
+    min_limit: float = None
+    max_limit: float = None
+    available: float = None
+    payment_methods: list = field(default_factory=list)
+    advertiser_id: str = None
+    completion_rate: float = None  # 0..1, over the site's recent window
+    order_count: int = None
+
+
+def parse_price(text):
+    """Converts a displayed price such as '4.62 MYR' or '1,234.5' to a float."""
+    return float(re.sub(r'[^0-9.]', '', text))
@@ -0,0 +1,199 @@
+"""
+Advertiser matching and reputation.
+
+Whitelists used to be compared against the raw advertiser text, so a name rendered
+with full-width characters, a non-breaking space or a different case
+('Kai  Trader 888', 'ｋａｉ trader 888') did not match its whitelist entry and the
+lookup kept scanning down the table. Names are now reduced to a canonical key
+(NFKC, case folded, invisible format characters dropped, whitespace collapsed) and
+matched against an AdvertiserIndex, a frozenset of the whitelist's keys, in O(1).
+Indexes and keys are memoised, as the same whitelists and names come back every poll.
+
+Every fetched ad also updates the ProfileCache, an LRU cache with a TTL of per-source
+advertiser stats (completion rate, order count). The stats come from the same
+response or table the ads were read from, so reputation rules (`min_completion_rate`,
+`min_orders`; see `configure`) cost no extra page visit. Ads that arrive without
+stats, e.g. from the DOM, are filled in from the cache. A whitelist, when given,
+takes precedence: listed advertisers are trusted and the rules only apply to lookups
+without one. Advertisers whose stats are unknown are never rejected.
+"""
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from . import metrics
+
+DEFAULT_PROFILE_CACHE_SIZE = 4096
+DEFAULT_PROFILE_TTL = 6 * 3600
+
+
+# ----------------------------- Names -----------------------------
+
+@lru_cache(maxsize=8192)
+def normalize_name(name):
+    """Canonical matching key of an advertiser name, or '' for None/blank names."""
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKC', unicodedata.normalize('NFKC', name).casefold())
+    text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Cf')
+    return ' '.join(text.split())
+
+
+class AdvertiserIndex:
+    """Set of normalised advertiser names, e.g. a whitelist."""
+
+    def __init__(self, names=()):
+        self.keys = frozenset(key for key in map(normalize_name, names) if key)
+
+    def __contains__(self, name):
+        return normalize_name(name) in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __bool__(self):
+        return bool(self.keys)
+
+
+@lru_cache(maxsize=256)
+def _index(names):
+    return AdvertiserIndex(names)
+
+
+def index_for(whitelist):
+    """The (shared) AdvertiserIndex of a whitelist list, or None for no whitelist."""
+    return _index(tuple(whitelist)) if whitelist else None
+
+
+# ----------------------------- Profiles -----------------------------
+
+@dataclass
+class AdvertiserProfile:
+    source: str
+    name: str
+    advertiser_id: str = None
+    completion_rate: float = None  # 0..1
+    order_count: int = None
+    updated: float = 0.0
+
+
+class ProfileCache:
+    """
+    Thread-safe LRU cache of AdvertiserProfiles keyed by (source, normalised name).
+
+    Args:
+        maxsize (int): Profiles kept; the least recently used are evicted first.
+        ttl (float): Seconds after which a profile is treated as unknown.
+    """
+
+    def __init__(self, maxsize=DEFAULT_PROFILE_CACHE_SIZE, ttl=DEFAULT_PROFILE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, source, name, now=None):
+        key = (source, normalize_name(name))
+        now = time.time() if now is None else now
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None or now - profile.updated > self.ttl:
+                if profile is not None:
+                    del self._profiles[key]
+                self.misses += 1
+                return None
+            self._profiles.move_to_end(key)
+            self.hits += 1
+            return profile
+
+    def observe(self, source, ad, now=None):
+        """
+        Records the stats carried by `ad`, or fills missing ones in from the cache.
+        Returns the advertiser's profile, or None if nothing is known about it.
+        """
+        key = (source, normalize_name(ad.advertiser))
+        if not key[1]:
+            return None
+        now = time.time() if now is None else now
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is not None and now - profile.updated > self.ttl:
+                profile = None
+            if ad.completion_rate is not None or ad.order_count is not None:
+                profile = AdvertiserProfile(
+                    source, ad.advertiser,
+                    advertiser_id=ad.advertiser_id or (profile.advertiser_id if profile else None),
+                    completion_rate=ad.completion_rate, order_count=ad.order_count, updated=now)
+                self._profiles[key] = profile
+                self._profiles.move_to_end(key)
+                while len(self._profiles) > self.maxsize:
+                    self._profiles.popitem(last=False)
+                return profile
+            if profile is None:
+                self.misses += 1
+                return None
+            self._profiles.move_to_end(key)
+            self.hits += 1
+        ad.advertiser_id = ad.advertiser_id or profile.advertiser_id
+        ad.completion_rate = profile.completion_rate
+        ad.order_count = profile.order_count
+        return profile
+
+    def summary(self):
+        with self._lock:
+            return {'profiles': len(self._profiles), 'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+            self.hits = self.misses = 0
+
+
+# ----------------------------- Selection -----------------------------
+
+PROFILES = ProfileCache()
+MIN_COMPLETION_RATE = 0.0
+MIN_ORDERS = 0
+
+
+def configure(min_completion_rate=0.0, min_orders=0, cache_size=DEFAULT_PROFILE_CACHE_SIZE,
+              profile_ttl=DEFAULT_PROFILE_TTL):
+    """Sets the reputation rules and resizes the shared profile cache."""
+    global MIN_COMPLETION_RATE, MIN_ORDERS
+    MIN_COMPLETION_RATE = min_completion_rate
+    MIN_ORDERS = min_orders
+    PROFILES.maxsize = cache_size
+    PROFILES.ttl = profile_ttl
+
+
+def reputable(ad):
+    """True unless the ad's known stats fall below the configured minimums."""
+    if MIN_COMPLETION_RATE and ad.completion_rate is not None and ad.completion_rate < MIN_COMPLETION_RATE:
+        return False
+    if MIN_ORDERS and ad.order_count is not None and ad.order_count < MIN_ORDERS:
+        return False
+    return True
+
+
+def select(source, ads, whitelist=None, limit=None):
+    """
+    Records the profiles of every ad in `ads`, then returns up to `limit` of them
+    (keeping their order) whose advertiser is in `whitelist` or, without a whitelist,
+    passes the reputation rules.
+    """
+    for ad in ads:
+        PROFILES.observe(source, ad)
+    index = index_for(whitelist)
+    if index is not None:
+        selected = [ad for ad in ads if ad.advertiser in index]
+    elif MIN_COMPLETION_RATE or MIN_ORDERS:
+        selected = [ad for ad in ads if reputable(ad)]
+        if len(selected) < len(ads):
+            metrics.inc('p2p_ads_rejected_total', amount=len(ads) - len(selected), source=source)
+    else:
+        selected = ads
+    return selected[:limit] if limit else selected
@@ -0,0 +1,20 @@
+"""
+Daily alert reset rule shared by the live monitors and the replay engine.
+
+Once the spread reaches a threshold, that threshold and every one below it count as
+alerted until the daily reset, which happens on the first check at or after 08:00 of
+a new day. The ladder evaluation itself lives in ladder.py.
+"""
+from datetime import timedelta
+
+RESET_HOUR = 8
+
+
+def should_reset(now, last_reset_date, reset_hour=RESET_HOUR):
+    """True if the alerts should be cleared at datetime `now`."""
+    return last_reset_date != now.date() and now.hour >= reset_hour
+
+
+def alert_period(now, reset_hour=RESET_HOUR):
+    """The date of the reset that opened the alert period containing datetime `now`."""
+    return (now - timedelta(hours=reset_hour)).date()
@@ -0,0 +1,235 @@
+"""
+Cross-venue, cross-currency arbitrage matrix.
+
+Every monitored page is a quote on a venue, a (source, fiat) pair such as
+(Bybit, MYR): a SELL page gives the venue's bid (what the asset can be sold for), a
+BUY page its ask. Quotes are normalised to one quote currency with FX rates, and
+
+    spread[i, j] = (bid[j] - ask[i]) / ask[i] * 100
+
+is the percentage gained by buying on venue i and selling on venue j. The diagonal is
+the ordinary single-venue spread the spread markets already alert on.
+
+The matrix is kept up to date incrementally: a new ask on venue i recomputes row i,
+a new bid on venue j column j, and an FX update the rows and columns of the venues in
+that currency. Each is one vectorised NumPy operation over N venues, so an update
+costs O(N) and picking the best opportunities (argpartition over the fresh part of
+the matrix) O(N²) in C, which stays cheap with dozens of fiat markets.
+
+FX rates come from a JSON endpoint (units of each currency per quote currency),
+cached for `ttl` seconds; stale rates keep being used if a refresh fails, and
+`static` rates override or fill in currencies the endpoint does not list.
+"""
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import requests
+
+from .common import debug, warning
+
+FX_URL = 'https://open.er-api.com/v6/latest/{base}'
+
+
+class FxRates:
+    """
+    Cached FX rates: units of a currency per one unit of `base`.
+
+    Args:
+        base (str): The common quote currency, e.g. 'USD'.
+        ttl (float): Seconds before the rates are refreshed.
+        url (str): Endpoint template returning {"rates": {"MYR": 4.4, ...}}; None for static only.
+        static (dict): Fixed rates that override the endpoint's.
+    """
+
+    def __init__(self, base='USD', ttl=3600, url=FX_URL, static=None, timeout=10):
+        self.base = base.upper()
+        self.ttl = ttl
+        self.url = url
+        self.static = {ccy.upper(): float(rate) for ccy, rate in (static or {}).items()}
+        self.timeout = timeout
+        self.rates = {self.base: 1.0}
+        self.version = 0  # bumped whenever the rates change
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fetch(self):
+        response = requests.get(self.url.format(base=self.base), timeout=self.timeout)
+        response.raise_for_status()
+        return {ccy.upper(): float(rate) for ccy, rate in response.json()['rates'].items()}
+
+    def refresh_if_stale(self, now=None):
+        """Refreshes the rates once they are older than the TTL; returns True if they changed."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if now - self._fetched_at < self.ttl:
+                return False
+            self._fetched_at = now
+            rates = {self.base: 1.0}
+            if self.url:
+                try:
+                    rates.update(self._fetch())
+                except Exception as e:
+                    warning("FX refresh failed, keeping the previous rates: {}", e)
+                    rates = dict(self.rates)
+            rates.update(self.static)
+            if rates == self.rates:
+                return False
+            self.rates = rates
+            self.version += 1
+            return True
+
+    def to_base(self, currency):
+        """Multiplier converting an amount in `currency` to the base currency, or NaN if unknown."""
+        rate = self.rates.get(currency.upper())
+        return 1.0 / rate if rate else math.nan
+
+
+@dataclass
+class Opportunity:
+    buy_venue: str
+    sell_venue: str
+    spread: float  # percent, after FX normalisation
+    ask: float  # in the buy venue's fiat
+    bid: float  # in the sell venue's fiat
+
+    @property
+    def name(self):
+        return f"ARB {self.buy_venue} -> {self.sell_venue}"
+
+
+def venue_name(source, fiat):
+    return f"{source} {fiat}"
+
+
+class ArbitrageMatrix:
+    """
+    Incrementally maintained N×N cross-venue spread matrix.
+
+    Args:
+        fx (FxRates): Rates used to normalise quotes.
+        max_quote_age (float): Quotes older than this are left out of best().
+    """
+
+    def __init__(self, fx, max_quote_age=180, capacity=16):
+        self.fx = fx
+        self.max_quote_age = max_quote_age
+        self.venues = []  # index -> name
+        self.fiats = []  # index -> fiat
+        self._index = {}
+        self._fx_version = -1
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        def grow(old, fill, shape):
+            new = np.full(shape, fill)
+            if old is not None:
+                new[tuple(slice(0, n) for n in old.shape)] = old
+            return new
+        self.ask = grow(getattr(self, 'ask', None), np.nan, capacity)  # raw fiat prices
+        self.bid = grow(getattr(self, 'bid', None), np.nan, capacity)
+        self.ask_ts = grow(getattr(self, 'ask_ts', None), -np.inf, capacity)
+        self.bid_ts = grow(getattr(self, 'bid_ts', None), -np.inf, capacity)
+        self.factor = grow(getattr(self, 'factor', None), np.nan, capacity)  # fiat -> base
+        self.spread = grow(getattr(self, 'spread', None), np.nan, (capacity, capacity))
+        self.capacity = capacity
+
+    def venue(self, source, fiat):
+        """Index of a venue, registering it (and growing the arrays) on first sight."""
+        name = venue_name(source, fiat)
+        index = self._index.get(name)
+        if index is None:
+            index = len(self.venues)
+            if index >= self.capacity:
+                self._alloc(self.capacity * 2)
+            self.venues.append(name)
+            self.fiats.append(fiat)
+            self._index[name] = index
+            self.factor[index] = self.fx.to_base(fiat)
+        return index
+
+    @property
+    def size(self):
+        return len(self.venues)
+
+    # ----------------------------- Updates -----------------------------
+
+    def _update_row(self, i):
+        n = self.size
+        ask = self.ask[i] * self.factor[i]
+        self.spread[i, :n] = (self.bid[:n] * self.factor[:n] - ask) / ask * 100
+
+    def _update_column(self, j):
+        n = self.size
+        asks = self.ask[:n] * self.factor[:n]
+        self.spread[:n, j] = (self.bid[j] * self.factor[j] - asks) / asks * 100
+
+    def update(self, source, fiat, side, price, ts=None):
+        """
+        Records a quote. `side` is the page side: 'BUY' pages give the venue's ask,
+        'SELL' pages its bid. A None price marks the quote as missing.
+        """
+        i = self.venue(source, fiat)
+        ts = time.time() if ts is None else ts
+        value = math.nan if price is None else price
+        if side == 'BUY':
+            self.ask[i], self.ask_ts[i] = value, ts
+            self._update_row(i)
+        else:
+            self.bid[i], self.bid_ts[i] = value, ts
+            self._update_column(i)
+
+    def refresh_fx(self, now=None):
+        """Refreshes FX if due and recomputes what changed; returns True if anything did."""
+        self.fx.refresh_if_stale(now)
+        if self.fx.version == self._fx_version:
+            return False
+        self._fx_version = self.fx.version
+        n = self.size
+        factors = np.array([self.fx.to_base(fiat) for fiat in self.fiats])
+        changed = np.flatnonzero(~np.isclose(factors, self.factor[:n], equal_nan=True))
+        self.factor[:n] = factors
+        if len(changed) * 2 >= n:
+            self.recompute()
+        else:
+            for k in changed:
+                self._update_row(k)
+                self._update_column(k)
+        return True
+
+    def recompute(self):
+        """Rebuilds the whole matrix (outer operation over all venues)."""
+        n = self.size
+        asks = self.ask[:n] * self.factor[:n]
+        bids = self.bid[:n] * self.factor[:n]
+        self.spread[:n, :n] = (bids[None, :] - asks[:, None]) / asks[:, None] * 100
+
+    # ----------------------------- Queries -----------------------------
+
+    def best(self, top_n=3, now=None, include_same_venue=False):
+        """The `top_n` highest fresh spreads as Opportunity records, best first."""
+        n = self.size
+        if n == 0:
+            return []
+        now = time.time() if now is None else now
+        cutoff = now - self.max_quote_age
+        matrix = self.spread[:n, :n].copy()
+        matrix[self.ask_ts[:n] < cutoff, :] = np.nan
+        matrix[:, self.bid_ts[:n] < cutoff] = np.nan
+        if not include_same_venue:
+            np.fill_diagonal(matrix, np.nan)
+        flat = np.where(np.isnan(matrix), -np.inf, matrix).ravel()
+        count = min(top_n, int(np.isfinite(flat).sum()))
+        if count == 0:
+            return []
+        top = np.argpartition(flat, -count)[-count:]
+        top = top[np.argsort(flat[top])[::-1]]
+        opportunities = []
+        for index in top:
+            i, j = divmod(int(index), n)
+            opportunities.append(Opportunity(self.venues[i], self.venues[j], float(flat[index]),
+                                             float(self.ask[i]), float(self.bid[j])))
+        debug("Best cross-venue spread: {}", opportunities[0] if opportunities else None)
+        return opportunities
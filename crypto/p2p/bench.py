@@ -0,0 +1,424 @@
+"""
+Offline benchmark of the rate fetchers against local Binance/Bybit fixtures.
+
+A local HTTP server stands in for the exchanges. It serves:
+
+- a Binance P2P page whose headline price (`div.headline5.mr-4xs.text-primaryText`)
+  is rendered by script after `--render-delay` ms, like the real page,
+- a Bybit OTC page with a `trade-table__tbody` of ad rows, including `new-user-ads`
+  rows that must be skipped and a mix of whitelisted and other advertisers,
+- the Binance and Bybit ad-list JSON endpoints with the same ads, for the JSON backend.
+  Like the real pages, both pages request their ad list from these endpoints before
+  rendering, which is the response the xhr backend captures.
+
+Recorded pages can replace the synthetic ones with `--fixtures DIR` (binance.html,
+bybit.html). Every scenario is run for a fixed number of iterations after a warm-up,
+and the report gives p50/p95 latency, throughput and peak memory (Python heap via
+tracemalloc, plus the Chrome process tree for the Selenium backend) as JSON, so two
+runs can be compared with `--compare previous.json`.
+
+Usage:
+    python -m p2p.bench --backend json --iterations 200 --output bench.json
+    python -m p2p.bench --backend selenium --backend xhr --chromedriver ../drivers/chromedriver --iterations 20
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import common, logs
+from .fetchers import BINANCE, BYBIT, Market, JsonFetcher, SeleniumFetcher, XhrFetcher
+
+ASSET, BINANCE_FIAT, BYBIT_FIAT = 'USDT', 'PGK', 'MYR'
+BINANCE_API_PATH = '/bapi/c2c/v2/friendly/c2c/adv/search'
+BYBIT_API_PATH = '/fiat/otc/item/online'
+BACKENDS = ('json', 'selenium', 'xhr')
+WHITELIST = ['TrustedTrader', 'FastPay MY']
+
+# Lookups run under tracemalloc to measure the Python heap peak of a scenario.
+MEMORY_PASS_ITERATIONS = 10
+
+
+# ----------------------------- Fixtures -----------------------------
+
+def synthetic_ads(count=20, new_user_every=4, base_price=4.45):
+    """Deterministic ad rows: (advertiser, price, available, min, max, payments, is_new_user_ad)."""
+    names = WHITELIST + [f'Merchant{i:02d}' for i in range(count)]
+    ads = []
+    for i in range(count):
+        ads.append((
+            names[(i * 3) % len(names)],
+            round(base_price + 0.01 * i, 2),
+            1000.0 + 137.5 * i,
+            100.0,
+            5000.0 + 250 * i,
+            ['Bank Transfer', 'DuitNow'][:1 + i % 2],
+            new_user_every and i % new_user_every == 1,
+        ))
+    return ads
+
+
+def _fetch_then_render(api_path, request, render_delay_ms):
+    """Script that requests the ad list like the real page does, then calls render() after the delay."""
+    return (f"fetch('{api_path}', {{method: 'POST', headers: {{'Content-Type': 'application/json'}}, "
+            f"body: '{json.dumps(request)}'}})\n"
+            f"    .catch(function () {{}})\n"
+            f"    .then(function () {{ setTimeout(render, {render_delay_ms}); }});")
+
+
+def binance_html(price, render_delay_ms):
+    request = {'asset': ASSET, 'fiat': BINANCE_FIAT, 'tradeType': 'SELL', 'page': 1, 'rows': 10}
+    return f"""<!DOCTYPE html>
+<html><head><title>Binance P2P fixture</title></head>
+<body>
+<div id="app"></div>
+<script>
+function render() {{
+    var div = document.createElement('div');
+    div.className = 'headline5 mr-4xs text-primaryText';
+    div.textContent = '{price:,.2f}';
+    document.getElementById('app').appendChild(div);
+}}
+{_fetch_then_render(BINANCE_API_PATH, request, render_delay_ms)}
+</script>
+</body></html>"""
+
+
+def bybit_html(ads, render_delay_ms):
+    rows = []
+    for name, price, available, low, high, payments, new_user in ads:
+        spans = ''.join(f'<span>{payment}</span>' for payment in payments)
+        rows.append(
+            f'<tr class="{"new-user-ads" if new_user else "trade-list__row"}">'
+            f'<td><div class="advertiser-name"><span>{name}</span></div>'
+            f'<div>{100 + 37 * len(name):,} orders | {95 + len(name) % 5}.50% completion</div></td>'
+            f'<td><span>{price:,.2f}</span> {BYBIT_FIAT}</td>'
+            f'<td>{available:,.2f} {ASSET}<br>{low:,.2f} ~ {high:,.2f} {BYBIT_FIAT}</td>'
+            f'<td>{spans}</td></tr>'
+        )
+    body = json.dumps(''.join(rows))
+    request = {'tokenId': ASSET, 'currencyId': BYBIT_FIAT, 'side': '1', 'size': '10', 'page': '1'}
+    return f"""<!DOCTYPE html>
+<html><head><title>Bybit OTC fixture</title></head>
+<body>
+<table><tbody class="trade-table__tbody"></tbody></table>
+<script>
+function render() {{
+    document.querySelector('tbody.trade-table__tbody').innerHTML = {body};
+}}
+{_fetch_then_render(BYBIT_API_PATH, request, render_delay_ms)}
+</script>
+</body></html>"""
+
+
+def binance_json(ads):
+    return {'code': '000000', 'data': [
+        {'adv': {'price': str(price), 'minSingleTransAmount': str(low), 'maxSingleTransAmount': str(high),
+                 'tradableQuantity': str(available),
+                 'tradeMethods': [{'tradeMethodName': payment} for payment in payments]},
+         'advertiser': {'nickName': name, 'monthOrderCount': 100 + 37 * len(name),
+                        'monthFinishRate': (95.5 + len(name) % 5) / 100}}
+        for name, price, available, low, high, payments, new_user in ads if not new_user
+    ]}
+
+
+def bybit_json(ads):
+    return {'ret_code': 0, 'result': {'count': len(ads), 'items': [
+        {'nickName': name, 'price': str(price), 'lastQuantity': str(available),
+         'minAmount': str(low), 'maxAmount': str(high), 'payments': payments,
+         'recentOrderNum': 100 + 37 * len(name), 'recentExecuteRate': 95 + len(name) % 5}
+        for name, price, available, low, high, payments, new_user in ads if not new_user
+    ]}}
+
+
+def binance_error_json(ads):
+    """A Binance response whose ads lack a price, as after an API change."""
+    payload = binance_json(ads)
+    for item in payload['data']:
+        del item['adv']['price']
+    return payload
+
+
+def bybit_error_json(ads):
+    return {'ret_code': 10001, 'ret_msg': 'params error', 'result': None}
+
+
+class FixtureServer:
+    """
+    Serves the fixture pages and JSON endpoints on a local port; with `api_errors`,
+    the endpoints answer with payloads the parsers reject.
+    """
+
+    BINANCE_PAGE = f'/trade/sell/{ASSET}'
+    BYBIT_PAGE = f'/en/fiat/trade/otc/buy/{ASSET}/{BYBIT_FIAT}'
+    BINANCE_API = BINANCE_API_PATH
+    BYBIT_API = BYBIT_API_PATH
+
+    def __init__(self, ads, render_delay_ms=0, fixtures_dir=None, host='127.0.0.1', api_errors=False):
+        pages = {
+            self.BINANCE_PAGE: binance_html(ads[0][1], render_delay_ms),
+            self.BYBIT_PAGE: bybit_html(ads, render_delay_ms),
+        }
+        if fixtures_dir:
+            for path, name in ((self.BINANCE_PAGE, 'binance.html'), (self.BYBIT_PAGE, 'bybit.html')):
+                recorded = os.path.join(fixtures_dir, name)
+                if os.path.exists(recorded):
+                    with open(recorded, 'r', encoding='utf-8') as file:
+                        pages[path] = file.read()
+        routes = {path: ('text/html; charset=utf-8', html.encode('utf-8')) for path, html in pages.items()}
+        apis = (binance_error_json, bybit_error_json) if api_errors else (binance_json, bybit_json)
+        routes[self.BINANCE_API] = ('application/json', json.dumps(apis[0](ads)).encode('utf-8'))
+        routes[self.BYBIT_API] = ('application/json', json.dumps(apis[1](ads)).encode('utf-8'))
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _reply(self):
+                route = routes.get(self.path.split('?')[0])
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                if route is None:
+                    self.send_error(404)
+                    return
+                content_type, body = route
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _reply
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f'http://{host}:{self.server.server_address[1]}'
+        self._thread = threading.Thread(target=self.server.serve_forever, name='bench-fixtures', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def market(self, source):
+        if source == BINANCE:
+            return Market(BINANCE, 'SELL', ASSET, BINANCE_FIAT, self.base_url + self.BINANCE_PAGE + f'?fiat={BINANCE_FIAT}')
+        return Market(BYBIT, 'BUY', ASSET, BYBIT_FIAT, self.base_url + self.BYBIT_PAGE)
+
+
+# ----------------------------- Scenarios -----------------------------
+
+@dataclass
+class Scenario:
+    name: str
+    source: str
+    whitelist: list = None
+    limit: int = 1
+
+
+SCENARIOS = [
+    Scenario('binance-price', BINANCE),
+    Scenario('bybit-best', BYBIT),
+    Scenario('bybit-whitelist', BYBIT, whitelist=WHITELIST),
+    Scenario('bybit-depth', BYBIT, limit=10),
+]
+
+
+@dataclass
+class ScenarioResult:
+    scenario: str
+    backend: str
+    iterations: int
+    concurrency: int
+    failures: int
+    p50_ms: float
+    p95_ms: float
+    mean_ms: float
+    throughput_per_s: float
+    peak_python_bytes: int
+    peak_chrome_rss_bytes: int = 0
+    latencies_ms: list = field(default_factory=list, repr=False)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def _timed(fetch):
+    start = time.perf_counter()
+    try:
+        ok = bool(fetch())
+    except Exception as e:
+        common.debug("Benchmark lookup failed: {}", e)
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def run_scenario(fetcher, backend, market, scenario, iterations, warmup=2, concurrency=1, rss_probe=None):
+    """Runs one scenario and returns its ScenarioResult."""
+    fetch = partial(fetcher.fetch_ads, market, whitelist=scenario.whitelist, limit=scenario.limit)
+    for _ in range(warmup):
+        _timed(fetch)
+
+    peak_rss = rss_probe() if rss_probe else 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(lambda _: _timed(fetch), range(iterations)))
+    elapsed = time.perf_counter() - started
+    if rss_probe:
+        peak_rss = max(peak_rss, rss_probe())
+
+    # tracemalloc slows every allocation down, so the heap peak is taken in a separate,
+    # shorter pass instead of during the timed one.
+    tracemalloc.start()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda _: _timed(fetch), range(min(iterations, MEMORY_PASS_ITERATIONS))))
+    _, peak_python = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = [seconds * 1000 for seconds, _ in outcomes]
+    return ScenarioResult(
+        scenario=scenario.name,
+        backend=backend,
+        iterations=iterations,
+        concurrency=concurrency,
+        failures=sum(1 for _, ok in outcomes if not ok),
+        p50_ms=round(percentile(latencies, 50), 3),
+        p95_ms=round(percentile(latencies, 95), 3),
+        mean_ms=round(sum(latencies) / len(latencies), 3),
+        throughput_per_s=round(iterations / elapsed, 2),
+        peak_python_bytes=peak_python,
+        peak_chrome_rss_bytes=peak_rss,
+        latencies_ms=[round(value, 3) for value in latencies],
+    )
+
+
+def _make_backend(backend, server, args):
+    """Returns (fetcher, rss_probe, cleanup) for a backend name."""
+    if backend == 'json':
+        fetcher = JsonFetcher(binance_api_url=server.base_url + server.BINANCE_API,
+                              bybit_api_url=server.base_url + server.BYBIT_API,
+                              pool_size=args.concurrency)
+        return fetcher, None, fetcher.close
+    if backend in ('selenium', 'xhr'):
+        if not args.chromedriver:
+            raise SystemExit(f"--chromedriver is required for the {backend} backend")
+        from .browser import BrowserProfile, create_chrome_driver
+        from .driver_pool import DriverPool
+        from .metrics import process_tree_rss
+        # The xhr backend reads the ad list from Chrome's performance log.
+        profile = BrowserProfile(capture_network=backend == 'xhr')
+        pool = DriverPool(partial(create_chrome_driver, args.chromedriver, profile), size=args.concurrency)
+        budget = args.ready_budget
+        fetcher_class = XhrFetcher if backend == 'xhr' else SeleniumFetcher
+        fetcher = fetcher_class(pool, ready_budgets={BINANCE: budget, BYBIT: budget})
+
+        def rss_probe():
+            return sum(process_tree_rss(pid) for pid in pool.driver_pids())
+        return fetcher, rss_probe, pool.close
+    raise SystemExit(f"Unknown backend: {backend}")
+
+
+def run_benchmarks(args):
+    scenarios = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    ads = synthetic_ads(args.rows)
+    results = []
+    with FixtureServer(ads, args.render_delay, args.fixtures, api_errors=args.api_errors) as server:
+        for backend in args.backend:
+            fetcher, rss_probe, cleanup = _make_backend(backend, server, args)
+            try:
+                for scenario in scenarios:
+                    result = run_scenario(fetcher, backend, server.market(scenario.source), scenario,
+                                          args.iterations, args.warmup, args.concurrency, rss_probe)
+                    print(f"{backend:9} {scenario.name:16} p50={result.p50_ms:9.2f}ms p95={result.p95_ms:9.2f}ms "
+                          f"{result.throughput_per_s:8.1f}/s failures={result.failures} "
+                          f"peak_py={result.peak_python_bytes / 1024:.0f}KiB "
+                          f"peak_chrome={result.peak_chrome_rss_bytes / 2**20:.0f}MiB", file=sys.stderr)
+                    results.append(result)
+            finally:
+                cleanup()
+    return results
+
+
+def compare(results, previous):
+    """Prints the p50/p95/throughput change of each scenario relative to a previous report."""
+    before = {(r['backend'], r['scenario']): r for r in previous.get('results', [])}
+    for result in results:
+        old = before.get((result.backend, result.scenario))
+        if not old:
+            continue
+        deltas = []
+        for key in ('p50_ms', 'p95_ms', 'throughput_per_s'):
+            if old[key]:
+                deltas.append(f"{key}={(getattr(result, key) / old[key] - 1) * 100:+.1f}%")
+        print(f"{result.backend:9} {result.scenario:16} " + ' '.join(deltas), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rate fetchers against local fixtures.")
+    parser.add_argument('--backend', action='append', choices=BACKENDS,
+                        help="Backend to benchmark (repeatable, default: json)")
+    parser.add_argument('--scenario', action='append', choices=[s.name for s in SCENARIOS],
+                        help="Only run this scenario (repeatable)")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=1, help="Lookups in flight at once")
+    parser.add_argument('--rows', type=int, default=20, help="Synthetic ad rows per page")
+    parser.add_argument('--render-delay', type=int, default=200, help="Milliseconds before the pages render their ads")
+    parser.add_argument('--fixtures', help="Directory with recorded binance.html / bybit.html pages")
+    parser.add_argument('--api-errors', action='store_true',
+                        help="Serve unparseable ad-list responses (exercises the xhr backend's DOM fallback)")
+    parser.add_argument('--chromedriver', help="Path to chromedriver (selenium and xhr backends)")
+    parser.add_argument('--ready-budget', type=float, default=20)
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    parser.add_argument('--compare', help="Previous JSON report to compare against")
+    parser.add_argument('--keep-samples', action='store_true', help="Include every latency sample in the report")
+    args = parser.parse_args(argv)
+    args.backend = args.backend or ['json']
+
+    logs.configure(verbose=False)
+    results = run_benchmarks(args)
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {key: getattr(args, key) for key in ('iterations', 'warmup', 'concurrency', 'rows', 'render_delay')},
+        'results': [],
+    }
+    for result in results:
+        entry = dict(result.__dict__)
+        if not args.keep_samples:
+            entry.pop('latencies_ms')
+        report['results'].append(entry)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            compare(results, json.load(file))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
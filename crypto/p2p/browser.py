@@ -0,0 +1,207 @@
+"""
+Chrome driver factory shared by every monitor.
+
+Besides headless mode and the user agent, the factory applies a BrowserProfile:
+
+- lean launch flags that switch off background networking, extensions, sync,
+  component updates and other work a scraper never needs, and stop images loading,
+- DevTools-protocol URL blocking (Network.setBlockedURLs) by resource type (images,
+  fonts, media, stylesheets) and for analytics/tracking hosts, plus any extra patterns,
+- an optional host allowlist: every host not listed fails to resolve, which is the
+  strictest mode and the way to find out which hosts the price really depends on.
+
+Page loads and scripts time out after `page_load_timeout` seconds instead of Chrome's
+default 300, so a hung page frees its pooled driver at about the lookup deadline
+rather than minutes after the lookup was abandoned.
+
+Run `python -m p2p.browser` to load every configured page with the profile from
+markets.json (or with --allow-host overrides) and check that the price still renders.
+"""
+import argparse
+import time
+from dataclasses import dataclass, field
+
+from .common import USER_AGENT, warning
+from .readiness import PAGE_LOAD_STRATEGY
+from .watchdog import watchdog_switch
+
+# Seconds before driver.get()/execute_script() give up; the default source deadline.
+DEFAULT_PAGE_LOAD_TIMEOUT = 45
+
+LEAN_CHROME_FLAGS = (
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-dev-shm-usage",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,InterestFeedContentSuggestions",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--blink-settings=imagesEnabled=false",
+)
+
+# URL patterns per blockable resource type, for Network.setBlockedURLs.
+RESOURCE_PATTERNS = {
+    'image': ("*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico"),
+    'font': ("*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"),
+    'media': ("*.mp4", "*.webm", "*.mp3", "*.m3u8"),
+    'stylesheet': ("*.css",),
+    'analytics': (
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*facebook.net*",
+        "*hotjar.com*", "*sentry.io*", "*sensorsdata*", "*clarity.ms*", "*intercom*", "*zendesk*",
+    ),
+}
+DEFAULT_BLOCK = ('image', 'font', 'media', 'analytics')
+
+
+@dataclass
+class BrowserProfile:
+    """
+    Launch flags and request blocking applied to every Chrome driver.
+
+    Args:
+        lean_flags (bool): Add LEAN_CHROME_FLAGS.
+        block (list): Resource types from RESOURCE_PATTERNS to block.
+        block_urls (list): Extra URL patterns ('*' wildcards) to block.
+        allow_hosts (list): If set, only these hosts (wildcards allowed) resolve.
+        capture_network (bool): Record DevTools network events in the performance log
+            (needed by the 'xhr' backend).
+    """
+    lean_flags: bool = True
+    block: list = field(default_factory=lambda: list(DEFAULT_BLOCK))
+    block_urls: list = field(default_factory=list)
+    allow_hosts: list = field(default_factory=list)
+    capture_network: bool = False
+
+    def blocked_urls(self):
+        patterns = []
+        for resource in self.block:
+            patterns.extend(RESOURCE_PATTERNS[resource])
+        patterns.extend(self.block_urls)
+        return patterns
+
+
+def parse_browser_profile(entry):
+    """Builds a BrowserProfile from the 'browser' section of markets.json."""
+    entry = entry or {}
+    block = list(entry.get('block', DEFAULT_BLOCK))
+    unknown = set(block) - set(RESOURCE_PATTERNS)
+    if unknown:
+        raise ValueError(f"browser.block: unknown resource type(s) {sorted(unknown)}; "
+                         f"expected some of {sorted(RESOURCE_PATTERNS)}")
+    return BrowserProfile(
+        lean_flags=bool(entry.get('lean_flags', True)),
+        block=block,
+        block_urls=list(entry.get('block_urls') or []),
+        allow_hosts=list(entry.get('allow_hosts') or []),
+    )
+
+
+def create_chrome_driver(chromedriver_path, profile=None, page_load_timeout=DEFAULT_PAGE_LOAD_TIMEOUT):
+    """Creates and returns a Selenium Chrome driver instance with desired options."""
+    # Imported here so that only the browser backends load Selenium.
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    profile = profile or BrowserProfile()
+    chrome_options = Options()
+    chrome_options.page_load_strategy = PAGE_LOAD_STRATEGY
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
+    if profile.lean_flags:
+        for flag in LEAN_CHROME_FLAGS:
+            chrome_options.add_argument(flag)
+    if profile.allow_hosts:
+        excluded = ', '.join(f"EXCLUDE {host}" for host in profile.allow_hosts)
+        chrome_options.add_argument(f"--host-resolver-rules=MAP * ~NOTFOUND , {excluded}")
+    if profile.capture_network:
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        chrome_options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+    # Marks our Chrome processes, and who started them, so the watchdog can find them once orphaned.
+    chrome_options.add_argument(watchdog_switch())
+    service = Service(chromedriver_path)
+    try:
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+    except Exception:
+        try:
+            service.stop()  # don't leave chromedriver running if the session never started
+        except Exception:
+            pass
+        raise
+    set_timeouts(driver, page_load_timeout)
+    blocked = profile.blocked_urls()
+    if blocked or profile.capture_network:
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            if blocked:
+                driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked})
+        except Exception as e:
+            warning("Could not enable request blocking: {}", e)
+    return driver
+
+
+def set_timeouts(driver, seconds):
+    """Bounds page loads and synchronous scripts on `driver` to `seconds`."""
+    driver.set_page_load_timeout(seconds)
+    driver.set_script_timeout(seconds)
+
+
+# ----------------------------- Profile check -----------------------------
+
+def check_profile(driver, urls, budget=20):
+    """
+    Loads each page and waits for its price to render; returns {url: (seconds, value or error)}.
+    """
+    from .fetchers import BINANCE, parse_market_url, BINANCE_PRICE_SELECTOR, BYBIT_TABLE_XPATH
+    from .readiness import css_text_probe, xpath_text_probe, wait_until_ready
+
+    results = {}
+    for url in urls:
+        market = parse_market_url(url)
+        probe = css_text_probe(BINANCE_PRICE_SELECTOR) if market.source == BINANCE else xpath_text_probe(BYBIT_TABLE_XPATH)
+        start = time.monotonic()
+        try:
+            driver.get(url)
+            value = wait_until_ready(driver, probe, budget)
+            results[url] = (time.monotonic() - start, value.splitlines()[0])
+        except Exception as e:
+            results[url] = (time.monotonic() - start, f"FAILED: {type(e).__name__}")
+    return results
+
+
+def main(argv=None):
+    from .config import load_config
+    from .monitor import DEFAULT_CONFIG_PATH
+
+    parser = argparse.ArgumentParser(description="Check that the configured pages still render with the browser profile.")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help="Path to markets.json")
+    parser.add_argument('--allow-host', action='append', help="Only let this host resolve (repeatable)")
+    parser.add_argument('--no-blocking', action='store_true', help="Load pages without any blocking, for comparison")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    profile = config.browser
+    if args.no_blocking:
+        profile = BrowserProfile(lean_flags=False, block=[])
+    elif args.allow_host:
+        profile = BrowserProfile(lean_flags=profile.lean_flags, block=profile.block,
+                                 block_urls=profile.block_urls, allow_hosts=args.allow_host)
+    urls = sorted({leg.url for market in config.markets for leg in market.legs.values()})
+    driver = create_chrome_driver(config.chromedriver_path, profile)
+    try:
+        for url, (seconds, value) in check_profile(driver, urls).items():
+            print(f"{seconds:6.2f}s  {value}  {url}")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
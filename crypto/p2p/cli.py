@@ -0,0 +1,103 @@
+"""
+The `crypto` command line.
+
+    crypto monitor [--config markets.json] [--market NAME ...]
+    crypto check-once [--market NAME ...]    one cycle, then exit (exit code 1 if a check failed)
+    crypto replay --market NAME --ladder 1.6:15000,1.8:5000 ...
+    crypto bench --backend json --iterations 200
+    crypto rate-cache [--port 8765]
+    crypto check-browser [--allow-host HOST ...]
+    crypto startup-check [--budget-ms 400]
+
+Each command's module is imported only when that command runs, and Selenium is only
+imported once a browser backend creates a driver, so one-shot runs start quickly.
+`startup-check` guards that: it times a fresh interpreter importing the CLI and the
+monitor, and fails if that is over budget or pulled in Selenium or NumPy.
+"""
+import importlib
+import json
+import os
+import subprocess
+import sys
+
+# command -> (module, function, summary)
+COMMANDS = {
+    'monitor': ('p2p.monitor', 'main', "Run the configured monitors until interrupted."),
+    'check-once': ('p2p.monitor', 'check_once_main', "Check every market once and exit."),
+    'replay': ('p2p.replay', 'main', "Replay stored ticks through candidate ladders."),
+    'bench': ('p2p.bench', 'main', "Benchmark the fetchers against local fixtures."),
+    'rate-cache': ('p2p.ratecache', 'main', "Run the shared local rate cache."),
+    'check-browser': ('p2p.browser', 'main', "Check the pages still render with the browser profile."),
+    'startup-check': ('p2p.cli', 'startup_check_main', "Time the CLI's import cost."),
+}
+
+# Modules a one-shot check with the JSON backend must not load.
+HEAVY_MODULES = ('selenium', 'numpy')
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import p2p.cli, p2p.monitor
+elapsed = time.perf_counter() - start
+print(json.dumps({'import_ms': elapsed * 1000,
+                  'heavy': [m for m in %r if m in sys.modules]}))
+"""
+
+
+def usage():
+    lines = ["usage: crypto <command> [options]", "", "commands:"]
+    lines += [f"  {name:15} {summary}" for name, (_, _, summary) in COMMANDS.items()]
+    lines += ["", "Run `crypto <command> --help` for the options of a command."]
+    return '\n'.join(lines)
+
+
+def startup_check(runs=5, python=sys.executable):
+    """Returns (best import time in ms, heavy modules loaded) over `runs` fresh interpreters."""
+    best, heavy = None, []
+    for _ in range(runs):
+        output = subprocess.run([python, '-c', STARTUP_SCRIPT % (HEAVY_MODULES,)], capture_output=True,
+                                text=True, check=True, cwd=_package_root()).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        best = result['import_ms'] if best is None else min(best, result['import_ms'])
+        heavy = sorted(set(heavy) | set(result['heavy']))
+    return best, heavy
+
+
+def _package_root():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def startup_check_main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='crypto startup-check', description="Time the CLI's import cost.")
+    parser.add_argument('--budget-ms', type=float, default=400, help="Fail above this import time")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+    import_ms, heavy = startup_check(args.runs)
+    print(f"import p2p.cli, p2p.monitor: {import_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    if heavy:
+        print(f"FAIL: eagerly imported {', '.join(heavy)}")
+        return 1
+    if import_ms > args.budget_ms:
+        print("FAIL: over budget")
+        return 1
+    print("OK")
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0 if argv else 2
+    command = COMMANDS.get(argv[0])
+    if command is None:
+        print(f"crypto: unknown command {argv[0]!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+    module, function, _ = command
+    return getattr(importlib.import_module(module), function)(argv[1:]) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
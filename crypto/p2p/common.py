@@ -0,0 +1,44 @@
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ----------------------------- Logging -----------------------------
+
+# The shared helpers log through the structured pipeline in logs.py;
+# use logs.configure() to change the level or add JSON-lines output.
+from .logs import log, debug, warning, error  # noqa: F401
+
+# Browser user agent used by both the Chrome driver and the JSON backend
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/114.0.0.0 Safari/537.36"
+)
+
+
+# ----------------------------- Files -----------------------------
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive advisory lock on `path` (created if missing), for files that several
+    monitor processes write to. Held by one process, and one thread, at a time.
+    """
+    with open(path, 'a+b') as file:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
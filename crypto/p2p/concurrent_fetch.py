@@ -0,0 +1,70 @@
+"""
+Concurrent fetching of every market URL in one monitor cycle.
+
+All lookups of a cycle are submitted to a small thread pool at once, so a cycle takes
+as long as its slowest lookup instead of the sum of all of them, and the two legs of a
+spread are sampled at nearly the same moment. Each result is stamped with the wall
+clock time it was observed, so callers can report how far apart two legs were taken.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from .common import debug, warning
+from .depth import DepthBook
+
+# Default cap on lookups in flight at once.
+MAX_IN_FLIGHT = 4
+
+
+@dataclass
+class Quote:
+    """The outcome of one lookup; `price` is None if the fetch failed."""
+    key: str
+    url: str
+    price: float
+    started_at: float
+    fetched_at: float
+    book: DepthBook = None
+
+    @property
+    def latency(self):
+        return self.fetched_at - self.started_at
+
+
+def _timed_fetch(key, fetch, url):
+    started_at = time.time()
+    try:
+        result = fetch(url)
+    except Exception as e:
+        warning("Error fetching {} from {}: {}", key, url, e)
+        result = None
+    if isinstance(result, DepthBook):
+        return Quote(key, url, result.best_price, started_at, time.time(), book=result)
+    return Quote(key, url, result, started_at, time.time())
+
+
+def fetch_quotes(jobs, max_in_flight=MAX_IN_FLIGHT):
+    """
+    Runs every lookup of a cycle in parallel.
+
+    Args:
+        jobs (dict): Maps a key to a (fetch, url) pair, where fetch(url) returns a price,
+            a DepthBook (kept on the quote as `book`) or None.
+        max_in_flight (int): Maximum number of lookups running at once; 1 runs them in order.
+
+    Returns:
+        dict: Maps each key to its Quote.
+    """
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(jobs)))) as executor:
+        futures = {key: executor.submit(_timed_fetch, key, fetch, url) for key, (fetch, url) in jobs.items()}
+        quotes = {key: future.result() for key, future in futures.items()}
+    debug("Fetched {} quotes in {:.2f}s", len(quotes), time.monotonic() - start)
+    return quotes
+
+
+def leg_skew(*quotes):
+    """Seconds between the earliest and latest observation among the given quotes."""
+    stamps = [q.fetched_at for q in quotes]
+    return max(stamps) - min(stamps)
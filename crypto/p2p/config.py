@@ -0,0 +1,282 @@
+"""
+Loading and validation of the monitor configuration file (markets.json).
+
+The file describes the shared fetch infrastructure, the named threshold ladders and
+one entry per market. A market is either:
+
+- a 'spread' market: a sell leg and a buy leg on the same source; the spread
+  (sell - buy) / buy in percent is evaluated against a named ladder, or
+- a 'price' market: a single leg whose best price is alerted on every poll while it
+  is at or above `threshold`.
+
+Leg URLs default to the source's page for the market's asset/fiat pair and side, and
+can be overridden per leg. Relative paths are resolved against the config file.
+The optional 'browser' section sets the Chrome launch flags and request blocking
+used by the Selenium backend (see browser.py).
+
+Each source picks its fetcher `backend` (see fetchers.py). The default is 'selenium',
+the rendered page the monitors have always scraped. 'xhr' reads the page's own ad-list
+response instead, and 'json' calls the sites' unofficial ad-list endpoints directly
+without a browser; both are opt-in until validated against the live sites.
+
+With `adaptive_polling` on, a market's `interval` is only used until its volatility
+is known; after that it is polled between its source's `min_interval` and
+`max_interval` depending on how close it is to its next trigger (see scheduler.py).
+
+The optional 'arbitrage' section compares every venue (source and fiat) against every
+other after converting to `quote_currency` with cached FX rates (see arbitrage.py).
+
+Whitelists are matched on normalised advertiser names. Lookups without a whitelist can
+instead skip advertisers below the optional 'advertisers' section's `min_completion_rate`
+(0..1) and `min_orders`, using the stats cached from earlier fetches (see advertisers.py).
+
+Each source also sets its lookup `deadline`, whether slow lookups are `hedge`d, and
+its circuit breaker (`breaker_failures`, `breaker_cooldown`; see resilience.py).
+"""
+import json
+import os
+from dataclasses import dataclass, field, replace
+
+from .browser import BrowserProfile, parse_browser_profile
+from .fetchers import BINANCE, BYBIT, market_url
+
+SOURCES = (BINANCE, BYBIT)
+BACKENDS = ('json', 'selenium', 'xhr')
+
+
+@dataclass
+class SourceConfig:
+    backend: str = 'selenium'
+    ready_budget: float = 20
+    min_interval: float = 15
+    max_interval: float = 120
+    deadline: float = 45
+    hedge: bool = True
+    hedge_min_delay: float = 1.0
+    breaker_failures: int = 3
+    breaker_cooldown: float = 300
+
+
+@dataclass
+class LegConfig:
+    side: str
+    url: str
+    whitelist: list = None
+
+
+@dataclass
+class MarketConfig:
+    name: str
+    type: str
+    source: str
+    asset: str
+    fiat: str
+    interval: float
+    legs: dict  # side -> LegConfig
+    ladder: str = None
+    threshold: float = None
+
+
+@dataclass
+class ArbitrageConfig:
+    enabled: bool = False
+    asset: str = 'USDT'
+    quote_currency: str = 'USD'
+    ladder: str = 'default'
+    top_n: int = 3
+    max_quote_age: float = 180
+    fx_ttl: float = 3600
+    fx_url: str = 'https://open.er-api.com/v6/latest/{base}'  # empty for fx_static only
+    fx_static: dict = field(default_factory=dict)  # currency -> units per quote currency
+
+
+@dataclass
+class AdvertiserConfig:
+    min_completion_rate: float = 0.0  # 0 disables the rule
+    min_orders: int = 0
+    profile_cache_size: int = 4096
+    profile_ttl: float = 6 * 3600
+
+
+@dataclass
+class MonitorConfig:
+    discord_webhook_url: str
+    chromedriver_path: str
+    tick_store_dir: str
+    state_path: str = ''
+    verbose: bool = True
+    log_level: str = None  # overrides `verbose` when set ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+    log_json_path: str = ''  # also write JSON-lines events here
+    log_ring_size: int = 1000
+    adaptive_polling: bool = True
+    discord_coalesce_window: float = 2.0
+    max_in_flight: int = 4
+    driver_pool_size: int = 2
+    driver_max_uses: int = 50
+    depth_levels: int = 10
+    metrics_port: int = 0  # 0 disables the metrics endpoint
+    feed_port: int = 0  # 0 disables the streaming tick feed
+    arbitrage: ArbitrageConfig = field(default_factory=ArbitrageConfig)
+    advertisers: AdvertiserConfig = field(default_factory=AdvertiserConfig)
+    browser: BrowserProfile = field(default_factory=BrowserProfile)
+    rate_cache_url: str = None  # shared rate cache daemon, if any
+    rate_cache_ttl: float = 10.0
+    watchdog_interval: float = 60  # 0 disables the Chrome process watchdog
+    driver_max_rss_mb: float = 1536
+    sources: dict = field(default_factory=dict)  # source -> SourceConfig
+    ladders: dict = field(default_factory=dict)  # name -> [(threshold, amount), ...]
+    markets: list = field(default_factory=list)  # [MarketConfig]
+
+    def browser_profile(self):
+        """The browser profile for the driver pool, with network capture on if a source uses 'xhr'."""
+        if any(source.backend == 'xhr' for source in self.sources.values()):
+            return replace(self.browser, capture_network=True)
+        return self.browser
+
+    def market(self, name):
+        for market in self.markets:
+            if market.name == name:
+                return market
+        raise KeyError(f"No market named {name!r} in the config")
+
+
+def _resolve(base_dir, path):
+    return path if os.path.isabs(path) else os.path.normpath(os.path.join(base_dir, path))
+
+
+def _parse_leg(entry, side, source, asset, fiat):
+    leg = entry.get(side.lower()) or {}
+    return LegConfig(
+        side=side,
+        url=leg.get('url') or market_url(source, side, asset, fiat),
+        whitelist=leg.get('whitelist'),
+    )
+
+
+def _parse_market(entry, ladders):
+    name = entry.get('name')
+    if not name:
+        raise ValueError(f"Market entry without a name: {entry}")
+    source = entry.get('source')
+    if source not in SOURCES:
+        raise ValueError(f"{name}: source must be one of {SOURCES}, got {source!r}")
+    market_type = entry.get('type', 'spread')
+    asset = entry.get('asset', 'USDT').upper()
+    fiat = entry.get('fiat', '').upper()
+    if not fiat:
+        raise ValueError(f"{name}: missing 'fiat'")
+    interval = float(entry.get('interval', 60))
+
+    if market_type == 'spread':
+        ladder = entry.get('ladder', 'default')
+        if ladder not in ladders:
+            raise ValueError(f"{name}: unknown ladder {ladder!r}")
+        legs = {side: _parse_leg(entry, side, source, asset, fiat) for side in ('SELL', 'BUY')}
+        return MarketConfig(name, market_type, source, asset, fiat, interval, legs, ladder=ladder)
+    if market_type == 'price':
+        side = entry.get('side', 'SELL').upper()
+        if 'threshold' not in entry:
+            raise ValueError(f"{name}: price markets need a 'threshold'")
+        legs = {side: _parse_leg(entry, side, source, asset, fiat)}
+        return MarketConfig(name, market_type, source, asset, fiat, interval, legs,
+                            threshold=float(entry['threshold']))
+    raise ValueError(f"{name}: type must be 'spread' or 'price', got {market_type!r}")
+
+
+def _parse_arbitrage(entry, ladders):
+    entry = entry or {}
+    config = ArbitrageConfig(
+        enabled=bool(entry.get('enabled', False)),
+        asset=entry.get('asset', 'USDT').upper(),
+        quote_currency=entry.get('quote_currency', 'USD').upper(),
+        ladder=entry.get('ladder', 'default'),
+        top_n=int(entry.get('top_n', 3)),
+        max_quote_age=float(entry.get('max_quote_age', 180)),
+        fx_ttl=float(entry.get('fx_ttl', 3600)),
+        fx_url=entry.get('fx_url', ArbitrageConfig.fx_url) or None,
+        fx_static={ccy.upper(): float(rate) for ccy, rate in (entry.get('fx_static') or {}).items()},
+    )
+    if config.enabled and config.ladder not in ladders:
+        raise ValueError(f"arbitrage: unknown ladder {config.ladder!r}")
+    return config
+
+
+def _parse_advertisers(entry):
+    entry = entry or {}
+    config = AdvertiserConfig(
+        min_completion_rate=float(entry.get('min_completion_rate', 0.0)),
+        min_orders=int(entry.get('min_orders', 0)),
+        profile_cache_size=int(entry.get('profile_cache_size', 4096)),
+        profile_ttl=float(entry.get('profile_ttl', 6 * 3600)),
+    )
+    if not 0 <= config.min_completion_rate <= 1:
+        raise ValueError("advertisers: min_completion_rate must be between 0 and 1")
+    return config
+
+
+def parse_config(data, base_dir='.'):
+    """Builds a MonitorConfig from already-decoded JSON data."""
+    sources = {}
+    for source in SOURCES:
+        entry = (data.get('sources') or {}).get(source, {})
+        backend = entry.get('backend', 'selenium')
+        if backend not in BACKENDS:
+            raise ValueError(f"{source}: backend must be one of {BACKENDS}, got {backend!r}")
+        min_interval = float(entry.get('min_interval', 15))
+        max_interval = float(entry.get('max_interval', 120))
+        if not 0 < min_interval <= max_interval:
+            raise ValueError(f"{source}: need 0 < min_interval <= max_interval")
+        sources[source] = SourceConfig(
+            backend=backend,
+            ready_budget=float(entry.get('ready_budget', 20)),
+            min_interval=min_interval,
+            max_interval=max_interval,
+            deadline=float(entry.get('deadline', 45)),
+            hedge=bool(entry.get('hedge', True)),
+            hedge_min_delay=float(entry.get('hedge_min_delay', 1.0)),
+            breaker_failures=int(entry.get('breaker_failures', 3)),
+            breaker_cooldown=float(entry.get('breaker_cooldown', 300)),
+        )
+
+    ladders = {name: [(float(thr), float(amt)) for thr, amt in steps]
+               for name, steps in (data.get('ladders') or {}).items()}
+    markets = [_parse_market(entry, ladders) for entry in data.get('markets') or [] if entry.get('enabled', True)]
+    names = [market.name for market in markets]
+    if len(set(names)) != len(names):
+        raise ValueError("Market names must be unique")
+
+    return MonitorConfig(
+        discord_webhook_url=data['discord_webhook_url'],
+        chromedriver_path=_resolve(base_dir, data.get('chromedriver_path', '../drivers/chromedriver.exe')),
+        tick_store_dir=_resolve(base_dir, data.get('tick_store_dir', '../data/ticks')),
+        state_path=_resolve(base_dir, data.get('state_path', '../data/alert_state.json')),
+        verbose=bool(data.get('verbose', True)),
+        log_level=data.get('log_level') or None,
+        log_json_path=_resolve(base_dir, data['log_json_path']) if data.get('log_json_path') else '',
+        log_ring_size=int(data.get('log_ring_size', 1000)),
+        adaptive_polling=bool(data.get('adaptive_polling', True)),
+        discord_coalesce_window=float(data.get('discord_coalesce_window', 2.0)),
+        max_in_flight=int(data.get('max_in_flight', 4)),
+        driver_pool_size=int(data.get('driver_pool_size', 2)),
+        driver_max_uses=int(data.get('driver_max_uses', 50)),
+        depth_levels=int(data.get('depth_levels', 10)),
+        metrics_port=int(data.get('metrics_port', 0)),
+        feed_port=int(data.get('feed_port', 0)),
+        arbitrage=_parse_arbitrage(data.get('arbitrage'), ladders),
+        advertisers=_parse_advertisers(data.get('advertisers')),
+        browser=parse_browser_profile(data.get('browser')),
+        rate_cache_url=data.get('rate_cache_url') or None,
+        rate_cache_ttl=float(data.get('rate_cache_ttl', 10.0)),
+        watchdog_interval=float(data.get('watchdog_interval', 60)),
+        driver_max_rss_mb=float(data.get('driver_max_rss_mb', 1536)),
+        sources=sources,
+        ladders=ladders,
+        markets=markets,
+    )
+
+
+def load_config(path):
+    """Reads and validates the JSON config file at `path`."""
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    return parse_config(data, base_dir=os.path.dirname(os.path.abspath(path)))
@@ -0,0 +1,101 @@
+"""
+Per-side order-book depth built from the top N ads of a page.
+
+A DepthBook keeps the ad prices best-first in compact arrays together with prefix sums
+of available quantity and notional, so the depth-weighted (VWAP) price of filling any
+tranche size is a single bisect plus O(1) arithmetic. That keeps it cheap to evaluate
+every ladder size on every tick.
+
+Sides follow the page the ads come from: on a 'SELL' page the user sells the asset to
+bidders (best = highest price); on a 'BUY' page the user buys from sellers (best =
+lowest price). Sizes are in asset units (USDT).
+"""
+from array import array
+from bisect import bisect_left
+
+
+class DepthBook:
+    """
+    Sorted depth for one side of a market.
+
+    Args:
+        side (str): 'BUY' or 'SELL', as in fetchers.Market.side.
+        levels (iterable): (price, quantity) pairs in any order.
+        best_price (float, optional): Top-of-book price when no quantities are known.
+    """
+
+    def __init__(self, side, levels, best_price=None):
+        self.side = side
+        levels = sorted((l for l in levels if l[1] and l[1] > 0), key=lambda l: l[0], reverse=side == 'SELL')
+        self.prices = array('d')
+        self.cum_qty = array('d')
+        self.cum_notional = array('d')
+        qty_total = notional_total = 0.0
+        for price, qty in levels:
+            qty_total += qty
+            notional_total += price * qty
+            self.prices.append(price)
+            self.cum_qty.append(qty_total)
+            self.cum_notional.append(notional_total)
+        self.best_price = best_price if best_price is not None else (self.prices[0] if self.prices else None)
+
+    @classmethod
+    def from_ads(cls, side, ads):
+        """Builds a book from Ad records; ads without an available quantity only set the best price."""
+        prices = [ad.price for ad in ads]
+        if not prices:
+            best = None
+        else:
+            best = max(prices) if side == 'SELL' else min(prices)
+        return cls(side, ((ad.price, ad.available) for ad in ads), best_price=best)
+
+    @property
+    def total_quantity(self):
+        return self.cum_qty[-1] if self.cum_qty else 0.0
+
+    def executable_price(self, size):
+        """
+        Volume-weighted price of filling `size` units best-first,
+        or None if the captured depth is smaller than `size`.
+        """
+        if size <= 0:
+            return self.best_price
+        i = bisect_left(self.cum_qty, size)
+        if i == len(self.cum_qty):
+            return None
+        filled_qty = self.cum_qty[i - 1] if i else 0.0
+        filled_notional = self.cum_notional[i - 1] if i else 0.0
+        return (filled_notional + (size - filled_qty) * self.prices[i]) / size
+
+    def executable_prices(self, sizes):
+        return [self.executable_price(size) for size in sizes]
+
+    def __repr__(self):
+        return f"DepthBook({self.side}, levels={len(self.prices)}, qty={self.total_quantity:.2f}, best={self.best_price})"
+
+
+def executable_spread(sell_book, buy_book, size):
+    """
+    Spread in percent achievable when buying `size` units on `buy_book` and selling them
+    on `sell_book`, using depth-weighted prices. Returns None if either side is too thin.
+    """
+    sell_price = sell_book.executable_price(size)
+    buy_price = buy_book.executable_price(size)
+    if sell_price is None or buy_price is None:
+        return None
+    return ((sell_price - buy_price) / buy_price) * 100
+
+
+def describe_executable_spread(sell_book, buy_book, size):
+    """
+    Describes the spread achievable for `size` units, using depth-weighted prices
+    rather than the top ad only.
+    """
+    if sell_book is None or buy_book is None:
+        return "Executable spread: no depth captured"
+    spread = executable_spread(sell_book, buy_book, size)
+    if spread is None:
+        return (f"Executable spread for {size:g}: insufficient depth "
+                f"(sell side {sell_book.total_quantity:.0f}, buy side {buy_book.total_quantity:.0f})")
+    return (f"Executable spread for {size:g}: {spread:.2f}% "
+            f"(sell VWAP {sell_book.executable_price(size):.4f}, buy VWAP {buy_book.executable_price(size):.4f})")
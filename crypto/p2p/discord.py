@@ -0,0 +1,192 @@
+"""
+Non-blocking Discord webhook notifications.
+
+DiscordNotifier.send() only enqueues the message; a background thread posts it over a
+persistent requests.Session, so a slow or rate-limited webhook never stalls the next
+scrape. Messages that arrive within `coalesce_window` seconds of each other are joined
+into one post (split at Discord's 2000 character limit). HTTP 429 responses are retried
+after the server's Retry-After, 5xx and connection errors with exponential backoff, and
+an exhausted rate-limit bucket (X-RateLimit-Remaining: 0) delays the next post until it
+resets. flush()/close() wait for queued messages on shutdown.
+"""
+import threading
+import time
+from queue import Queue, Empty, Full
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+from .common import error, log, warning
+
+DISCORD_MESSAGE_LIMIT = 2000
+
+
+def _retry_after(response, default):
+    """Seconds to wait after a 429, from the Retry-After header or the JSON body."""
+    header = response.headers.get('Retry-After')
+    if header is not None:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    try:
+        return float(response.json().get('retry_after', default))
+    except Exception:
+        return default
+
+
+def split_message(text, limit=DISCORD_MESSAGE_LIMIT):
+    """Splits text into chunks of at most `limit` characters, preferring line breaks."""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind('\n', 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip('\n')
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+class DiscordNotifier:
+    """
+    Background sender for one Discord webhook.
+
+    Args:
+        webhook_url (str): The webhook to post to.
+        queue_size (int): Maximum queued messages; further messages are dropped (and logged).
+        coalesce_window (float): Seconds to wait for more messages to join into one post.
+        timeout (float): Per-request timeout in seconds.
+        max_retries (int): Retries for a post after 429/5xx/connection errors.
+        backoff (float): Base delay in seconds for exponential backoff.
+    """
+
+    def __init__(self, webhook_url, queue_size=100, coalesce_window=2.0, timeout=10, max_retries=5, backoff=1.0):
+        self.webhook_url = webhook_url
+        self.coalesce_window = coalesce_window
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self._queue = Queue(maxsize=queue_size)
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._flushing = threading.Event()
+        self._stopping = threading.Event()
+        self._not_before = 0.0
+        self._thread = threading.Thread(target=self._run, name='discord-notifier', daemon=True)
+        self._thread.start()
+
+    # ----------------------------- Public API -----------------------------
+
+    def send(self, message):
+        """Queues a message without blocking; returns False if it had to be dropped."""
+        if self._stopping.is_set():
+            warning("Discord notifier is closed; message dropped.")
+            return False
+        with self._idle:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except Full:
+            self._done(1)
+            warning("Discord queue is full; message dropped.")
+            return False
+
+    def flush(self, timeout=None):
+        """Sends queued messages immediately and waits for them; returns True if all were handled."""
+        self._flushing.set()
+        try:
+            with self._idle:
+                return self._idle.wait_for(lambda: self._pending == 0, timeout)
+        finally:
+            self._flushing.clear()
+
+    def close(self, timeout=10):
+        """Flushes pending messages and stops the background thread."""
+        flushed = self.flush(timeout)
+        self._stopping.set()
+        self._thread.join(timeout=1)
+        self.session.close()
+        return flushed
+
+    # ----------------------------- Worker -----------------------------
+
+    def _done(self, count):
+        with self._idle:
+            self._pending -= count
+            self._idle.notify_all()
+
+    def _collect(self, first):
+        """Gathers messages arriving within the coalescing window after `first`."""
+        batch = [first]
+        deadline = time.monotonic() + self.coalesce_window
+        while not self._flushing.is_set() and not self._stopping.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.05)))
+            except Empty:
+                continue
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except Empty:
+                return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=0.1)
+            except Empty:
+                continue
+            batch = self._collect(first)
+            try:
+                for chunk in split_message("\n\n".join(batch)):
+                    self._post(chunk)
+            except Exception as e:
+                error("Exception while sending Discord message: {}", e)
+            finally:
+                self._done(len(batch))
+
+    def _wait(self, seconds):
+        if seconds > 0:
+            self._stopping.wait(seconds)
+
+    def _post(self, content):
+        for attempt in range(self.max_retries + 1):
+            self._wait(self._not_before - time.monotonic())
+            try:
+                with metrics.stage('discord', 'webhook'):
+                    response = self.session.post(self.webhook_url, json={"content": content}, timeout=self.timeout)
+            except requests.RequestException as e:
+                metrics.inc('p2p_discord_failures_total', error=type(e).__name__)
+                delay = self.backoff * 2 ** attempt
+                warning("Exception while sending Discord message: {}; retrying in {:.1f}s", e, delay)
+                self._wait(delay)
+                continue
+            if response.headers.get('X-RateLimit-Remaining') == '0':
+                reset_after = float(response.headers.get('X-RateLimit-Reset-After', 0) or 0)
+                self._not_before = time.monotonic() + reset_after
+            metrics.inc('p2p_discord_posts_total', status=response.status_code)
+            if response.status_code in (200, 204):
+                log("Message sent to Discord successfully!")
+                return True
+            if response.status_code == 429:
+                delay = _retry_after(response, self.backoff * 2 ** attempt)
+                warning("Discord rate limit hit; retrying in {:.1f}s", delay)
+            elif response.status_code >= 500:
+                delay = self.backoff * 2 ** attempt
+                warning("Discord error {}; retrying in {:.1f}s", response.status_code, delay)
+            else:
+                error("Failed to send message to Discord: {} - {}", response.status_code, response.text)
+                return False
+            self._wait(delay)
+        error("Giving up on Discord message after repeated failures.")
+        return False
@@ -0,0 +1,107 @@
+"""
+Bulk extraction of the Bybit OTC ad table.
+
+Calling `row.find_element(...)` for every cell costs one WebDriver HTTP round trip per
+call. Instead, a single `execute_script` reads every non 'new-user-ads' row of the
+`trade-table__tbody` into plain dictionaries, and the rows are turned into Ad records
+(and whitelist-filtered) in Python.
+"""
+import re
+
+from .common import debug
+from .ads import Ad, parse_price
+
+# Returns one {advertiser, stats, price, quantity, payments} object per ad row; `stats` is
+# the whole advertiser cell, e.g. 'Kai Trader 888\n1,024 orders | 98.50% completion'.
+BYBIT_ROWS_SCRIPT = """
+var snapshot = document.evaluate(arguments[0], document, null,
+    XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var text = function (node) { return node ? node.innerText.trim() : null; };
+var rows = [];
+for (var i = 0; i < snapshot.snapshotLength; i++) {
+    var tr = snapshot.snapshotItem(i);
+    var cells = tr.querySelectorAll(':scope > td');
+    rows.push({
+        advertiser: text(tr.querySelector("div[class*='advertiser-name'] span")),
+        stats: text(cells.length > 0 ? cells[0] : null),
+        price: text(cells.length > 1 ? cells[1].querySelector('span') : null),
+        quantity: text(cells.length > 2 ? cells[2] : null),
+        payments: cells.length > 3
+            ? Array.prototype.map.call(cells[3].querySelectorAll('span'), text).filter(Boolean)
+            : []
+    });
+}
+return rows;
+"""
+
+_NUMBER = r'\d[\d,]*(?:\.\d+)?'
+_LIMITS_RE = re.compile(rf'({_NUMBER})\s*[~\-–]\s*({_NUMBER})')
+_NUMBER_RE = re.compile(_NUMBER)
+_ORDERS_RE = re.compile(rf'({_NUMBER})\s*orders?', re.IGNORECASE)
+_COMPLETION_RE = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+
+
+def _to_float(text):
+    return float(text.replace(',', ''))
+
+
+def parse_quantity_cell(text):
+    """
+    Splits the 'Available / Limits' cell, e.g. '1,234.56 USDT\\n100.00 ~ 5,000.00 MYR',
+    into (available, min_limit, max_limit). Missing parts are None.
+    """
+    if not text:
+        return None, None, None
+    min_limit = max_limit = None
+    limits = _LIMITS_RE.search(text)
+    if limits:
+        min_limit, max_limit = _to_float(limits.group(1)), _to_float(limits.group(2))
+        text = text[:limits.start()] + text[limits.end():]
+    available = _NUMBER_RE.search(text)
+    return (_to_float(available.group(0)) if available else None), min_limit, max_limit
+
+
+def parse_advertiser_cell(text, name=None):
+    """
+    Reads (completion_rate, order_count) from the advertiser cell, ignoring the
+    advertiser's `name` itself (which may contain digits or '%'). Missing parts are None.
+    """
+    if name and text:
+        text = text.replace(name, '', 1)
+    if not text:
+        return None, None
+    orders = _ORDERS_RE.search(text)
+    completion = _COMPLETION_RE.search(text)
+    return (float(completion.group(1)) / 100 if completion else None,
+            int(_to_float(orders.group(1))) if orders else None)
+
+
+def rows_to_ads(rows):
+    """Converts the dictionaries returned by BYBIT_ROWS_SCRIPT into Ad records."""
+    ads = []
+    for row in rows:
+        try:
+            price = parse_price(row.get('price') or '')
+        except ValueError:
+            debug("Skipping row with unparseable price: {!r}", row.get('price'))
+            continue
+        available, min_limit, max_limit = parse_quantity_cell(row.get('quantity'))
+        completion_rate, order_count = parse_advertiser_cell(row.get('stats'), row.get('advertiser'))
+        ads.append(Ad(
+            price=price,
+            advertiser=row.get('advertiser'),
+            min_limit=min_limit,
+            max_limit=max_limit,
+            available=available,
+            payment_methods=row.get('payments') or [],
+            completion_rate=completion_rate,
+            order_count=order_count,
+        ))
+    return ads
+
+
+def extract_bybit_ads(driver, rows_xpath):
+    """Reads every ad row matching `rows_xpath` on the loaded Bybit OTC page in one round trip."""
+    ads = rows_to_ads(driver.execute_script(BYBIT_ROWS_SCRIPT, rows_xpath))
+    debug("Extracted {} Bybit ad rows", len(ads))
+    return ads
@@ -0,0 +1,185 @@
+"""
+Long-lived pool of Selenium Chrome drivers.
+
+Starting a headless Chrome costs seconds and a CPU/RAM spike, so the scrapers check a
+driver out of the pool, navigate with it and hand it back instead of creating and
+quitting one per lookup. Drivers are health-checked on checkout and recycled after a
+fixed number of navigations (or once they get too old, or once the watchdog retires
+them for using too much memory) to keep memory bounded. Any process of a driver's tree
+still alive after quit() is killed.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from queue import Queue, Empty
+
+from . import metrics
+from .common import log, warning
+from .watchdog import kill_pids, process_table, process_tree
+
+
+class PooledDriver:
+    """A driver together with the bookkeeping the pool needs to recycle it."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.uses = 0
+        self.retired = None  # reason, once the watchdog asked for it to be recycled
+        self.page_load_timeout = None  # as last set by a fetcher
+
+
+class DriverPool:
+    """
+    Fixed-size pool of drivers created lazily by `factory`.
+
+    Args:
+        factory (callable): Zero-argument function returning a new driver.
+        size (int): Maximum number of live drivers.
+        max_uses (int): Recycle a driver after this many checkouts.
+        max_age (float): Recycle a driver after this many seconds.
+        checkout_timeout (float): Seconds to wait for a free driver before giving up.
+    """
+
+    def __init__(self, factory, size=1, max_uses=50, max_age=3600, checkout_timeout=120):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.checkout_timeout = checkout_timeout
+        self._idle = Queue()
+        self._lock = threading.Lock()
+        self._live = 0
+        self._entries = set()
+        self._closed = False
+
+    def _create(self):
+        with self._lock:
+            if self._live >= self.size:
+                return None
+            self._live += 1
+        try:
+            log("Driver pool: starting a new Chrome driver...")
+            with metrics.stage('chrome', 'driver_start'):
+                entry = PooledDriver(self.factory())
+        except Exception:
+            with self._lock:
+                self._live -= 1
+            raise
+        with self._lock:
+            self._entries.add(entry)
+        return entry
+
+    def _destroy(self, entry, reason):
+        log("Driver pool: recycling driver ({}).", reason)
+        pid = self.driver_pid(entry)
+        tree = process_tree(pid) if pid is not None else []
+        try:
+            entry.driver.quit()
+        except Exception as e:
+            warning("Driver pool: error while quitting driver: {}", e)
+        finally:
+            # quit() can leave Chrome processes behind (crashed renderer, hung browser).
+            survivors = process_table() if tree else None
+            if survivors:
+                leftover = [p for p in tree if p in survivors and p != os.getpid()]
+                if leftover:
+                    warning("Driver pool: killed {} process(es) left after quit().", kill_pids(leftover))
+            with self._lock:
+                self._live -= 1
+                self._entries.discard(entry)
+
+    def _is_expired(self, entry):
+        return entry.retired is not None or entry.uses >= self.max_uses or time.monotonic() - entry.created_at >= self.max_age
+
+    @staticmethod
+    def _is_healthy(entry):
+        """Cheap liveness probe: any WebDriver round trip fails once Chrome has died."""
+        try:
+            entry.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def entries(self):
+        """Every live driver, idle or checked out."""
+        with self._lock:
+            return list(self._entries)
+
+    @staticmethod
+    def driver_pid(entry):
+        """Process id of the chromedriver service behind a driver, if known."""
+        process = getattr(getattr(entry.driver, 'service', None), 'process', None)
+        return process.pid if process is not None else None
+
+    def driver_pids(self):
+        """Process ids of the chromedriver service behind every live driver."""
+        return [pid for pid in map(self.driver_pid, self.entries()) if pid is not None]
+
+    def retire(self, entry, reason):
+        """Marks a driver to be recycled at its next checkin or checkout; returns False if it already was."""
+        if entry.retired is not None:
+            return False
+        entry.retired = reason
+        log("Driver pool: retiring driver ({}).", reason)
+        return True
+
+    def checkout(self):
+        """Returns a healthy PooledDriver, starting one if the pool is not yet full."""
+        if self._closed:
+            raise RuntimeError("Driver pool is closed")
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except Empty:
+                entry = self._create()
+                if entry is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a free Chrome driver")
+                    try:
+                        entry = self._idle.get(timeout=remaining)
+                    except Empty:
+                        continue
+            if self._is_expired(entry):
+                self._destroy(entry, entry.retired or "use/age budget reached")
+                continue
+            if not self._is_healthy(entry):
+                self._destroy(entry, "failed health check")
+                continue
+            return entry
+
+    def checkin(self, entry, discard=False):
+        """Returns a driver to the pool, or quits it if it is broken or used up."""
+        entry.uses += 1
+        if discard or self._closed:
+            self._destroy(entry, "discarded" if discard else "pool closed")
+        elif self._is_expired(entry):
+            self._destroy(entry, entry.retired or "use/age budget reached")
+        else:
+            self._idle.put(entry)
+
+    @contextmanager
+    def driver(self):
+        """
+        Context manager yielding a checked-out Selenium driver.
+        Page-level errors do not discard the driver; a dead browser is caught by the
+        health check on its next checkout.
+        """
+        entry = self.checkout()
+        try:
+            yield entry.driver
+        finally:
+            self.checkin(entry)
+
+    def close(self):
+        """Quits every idle driver and stops handing out new ones."""
+        self._closed = True
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except Empty:
+                break
+            self._destroy(entry, "pool closed")
@@ -0,0 +1,154 @@
+"""
+Local streaming feed of every tick the monitor computes.
+
+Each check publishes a tick: the market's rates, its spread (or price), and for
+spread markets the state of its ladder. Clients subscribe over Server-Sent Events:
+
+    GET /stream[?market=NAME&market=...]    snapshot of the latest tick per market on
+                                            connect, then every new tick as it happens
+    GET /snapshot[?market=NAME...]          latest tick per market as one JSON object
+
+Backpressure is handled per client by conflation: a client holds at most one pending
+tick per market, so when it falls behind, newer ticks replace the stale ones it has
+not been sent yet (counted in the `dropped` field of the next event) and a slow
+consumer never makes the monitor or the other clients wait. A client whose socket
+stays blocked for `write_timeout` seconds is disconnected.
+
+SSE rather than WebSocket: it is one-way, which is all a feed needs, works with the
+standard library server and is read natively by browsers (EventSource).
+"""
+import json
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+
+from .common import log, warning
+
+KEEPALIVE = 15.0
+
+
+class _Client:
+    """Pending ticks of one subscriber, at most one per market."""
+
+    def __init__(self, markets):
+        self.markets = set(markets) if markets else None
+        self.pending = {}
+        self.dropped = 0
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+
+    def offer(self, tick):
+        if self.markets is not None and tick['market'] not in self.markets:
+            return
+        with self.lock:
+            if tick['market'] in self.pending:
+                self.dropped += 1
+            self.pending[tick['market']] = tick
+        self.ready.set()
+
+    def take(self):
+        with self.lock:
+            ticks, dropped = list(self.pending.values()), self.dropped
+            self.pending.clear()
+            self.dropped = 0
+            self.ready.clear()
+        return ticks, dropped
+
+
+class TickFeed:
+    """Keeps the latest tick per market and fans new ticks out to subscribers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest = {}
+        self._clients = set()
+
+    def publish(self, market, **fields):
+        """Publishes a tick for `market`; never blocks on subscribers."""
+        tick = dict(fields, market=market, ts=fields.get('ts') or time.time())
+        with self._lock:
+            self._latest[market] = tick
+            clients = list(self._clients)
+        for client in clients:
+            client.offer(tick)
+
+    def snapshot(self, markets=None):
+        with self._lock:
+            return {name: tick for name, tick in self._latest.items() if not markets or name in markets}
+
+    def subscribe(self, markets=None):
+        client = _Client(markets)
+        with self._lock:
+            self._clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    @property
+    def subscribers(self):
+        with self._lock:
+            return len(self._clients)
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode('utf-8')
+
+
+def serve_feed(feed, port, host='127.0.0.1', write_timeout=10.0):
+    """Serves `feed` on http://host:port/stream from a daemon thread; returns the server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class FeedHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            markets = parse_qs(parsed.query).get('market')
+            if parsed.path == '/snapshot':
+                body = json.dumps(feed.snapshot(markets)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif parsed.path == '/stream':
+                self._stream(markets)
+            else:
+                self.send_error(404)
+
+        def _stream(self, markets):
+            self.connection.settimeout(write_timeout)
+            client = feed.subscribe(markets)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            try:
+                self.wfile.write(_sse('snapshot', feed.snapshot(markets)))
+                while True:
+                    if not client.ready.wait(KEEPALIVE):
+                        self.wfile.write(b": keep-alive\n\n")
+                        continue
+                    ticks, dropped = client.take()
+                    if dropped:
+                        ticks[-1] = dict(ticks[-1], dropped=dropped)
+                    self.wfile.write(b''.join(_sse('tick', tick) for tick in ticks))
+            except OSError as e:
+                if not isinstance(e, (BrokenPipeError, ConnectionResetError)):
+                    warning("Feed client {} disconnected: {}", self.client_address[0], e)
+            finally:
+                feed.unsubscribe(client)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), FeedHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='tick-feed', daemon=True).start()
+    log("Streaming ticks on http://{}:{}/stream", host, server.server_address[1])
+    return server
@@ -0,0 +1,414 @@
+"""
+Pluggable rate fetchers for the Binance P2P and Bybit OTC markets.
+
+A market is identified by the same page URL the monitors have always used. Every
+fetcher turns such a URL into a list of `Ad` records (best price first), so the
+monitors can pick a backend per source without changing how they compute spreads:
+
+- SeleniumFetcher renders the page in a pooled Chrome and scrapes the DOM.
+- XhrFetcher renders the page too, but reads the ad list from the JSON response the
+  page fetches for itself, and only falls back to the DOM if none is captured.
+- JsonFetcher calls the JSON endpoints the pages themselves use, over a pooled
+  requests.Session, which is a single sub-second round trip per lookup.
+"""
+import json
+from dataclasses import dataclass
+from functools import partial
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import advertisers, metrics, xhr_capture
+from .ads import Ad, parse_price
+from .browser import set_timeouts
+from .common import USER_AGENT, debug, log, warning
+from .depth import DepthBook
+from .dom_extract import extract_bybit_ads
+from .readiness import css_text_probe, xpath_text_probe, wait_until_ready
+
+BINANCE = 'Binance'
+BYBIT = 'Bybit'
+
+BINANCE_PRICE_SELECTOR = 'div.headline5.mr-4xs.text-primaryText'
+BYBIT_TABLE_XPATH = "//tbody[contains(@class, 'trade-table__tbody')]"
+BYBIT_ROWS_XPATH = BYBIT_TABLE_XPATH + "/tr[not(contains(@class, 'new-user-ads'))]"
+
+# Number of ads captured per side for depth snapshots
+DEPTH_LEVELS = 10
+
+BINANCE_API_URL = 'https://p2p.binance.com/bapi/c2c/v2/friendly/c2c/adv/search'
+BYBIT_API_URL = 'https://api2.bybit.com/fiat/otc/item/online'
+
+
+@dataclass
+class Market:
+    """The query behind a Binance P2P or Bybit OTC page URL."""
+    source: str
+    side: str  # 'BUY' or 'SELL', from the point of view of the user visiting the page
+    asset: str
+    fiat: str
+    url: str
+
+
+def market_url(source, side, asset, fiat):
+    """Builds the page URL for a source, side ('BUY'/'SELL') and asset/fiat pair."""
+    if source == BINANCE:
+        if side == 'SELL':
+            return f'https://p2p.binance.com/trade/sell/{asset}?fiat={fiat}&payment=all-payments'
+        return f'https://p2p.binance.com/trade/all-payments/{asset}?fiat={fiat}'
+    if source == BYBIT:
+        return f'https://www.bybit.com/en/fiat/trade/otc/{side.lower()}/{asset}/{fiat}'
+    raise ValueError(f"Unsupported source: {source}")
+
+
+def parse_market_url(url):
+    """
+    Parses a Binance P2P or Bybit OTC page URL into a Market.
+
+    Supported forms:
+        https://p2p.binance.com/trade/sell/USDT?fiat=PGK&payment=all-payments
+        https://p2p.binance.com/trade/all-payments/USDT?fiat=PGK   (buy side)
+        https://www.bybit.com/en/fiat/trade/otc/buy/USDT/MYR
+    """
+    parsed = urlparse(url)
+    parts = [p for p in parsed.path.split('/') if p]
+    if 'binance' in parsed.netloc:
+        # /trade/<side or payment>/<asset>
+        side = 'SELL' if parts[1].lower() == 'sell' else 'BUY'
+        fiat = parse_qs(parsed.query).get('fiat', [''])[0]
+        return Market(BINANCE, side, parts[2].upper(), fiat.upper(), url)
+    if 'bybit' in parsed.netloc:
+        # /<lang>/fiat/trade/otc/<side>/<asset>/<fiat>
+        side, asset, fiat = parts[-3:]
+        return Market(BYBIT, side.upper(), asset.upper(), fiat.upper(), url)
+    raise ValueError(f"Unsupported market URL: {url}")
+
+
+class RateFetcher:
+    """Base class: subclasses implement fetch_ads(market, whitelist, limit)."""
+
+    name = 'base'
+
+    def fetch_ads(self, market, whitelist=None, limit=None):
+        """Returns up to `limit` ads (best first) whose advertiser is in `whitelist`, if given."""
+        raise NotImplementedError
+
+    def _lookup(self, url, whitelist, limit, what):
+        """Fetches the ads behind `url`; returns (market, ads), or None on failure or no match."""
+        try:
+            market = parse_market_url(url)
+        except ValueError as e:
+            warning("Error extracting {} from {}: {}", what, url, e)
+            return None
+        metrics.inc('p2p_fetch_total', source=market.source)
+        try:
+            with metrics.stage(market.source, 'fetch'):
+                ads = self.fetch_ads(market, whitelist=whitelist, limit=limit)
+        except Exception as e:
+            metrics.inc('p2p_fetch_failures_total', source=market.source, error=type(e).__name__)
+            warning("Error extracting {} from {}: {}", what, url, e)
+            return None
+        if not ads:
+            metrics.inc('p2p_fetch_empty_total', source=market.source)
+            log("No valid row found matching criteria.")
+            return None
+        return market, ads
+
+    def get_rate(self, url, whitelist=None):
+        """
+        Returns the best price on the page at `url`, optionally restricted to
+        whitelisted advertisers, or None on failure.
+        """
+        found = self._lookup(url, whitelist, 1, 'price')
+        return found[1][0].price if found else None
+
+    def get_book(self, url, whitelist=None, depth=DEPTH_LEVELS):
+        """
+        Returns a DepthBook of the top `depth` ads on the page at `url`, optionally
+        restricted to whitelisted advertisers, or None on failure.
+        """
+        found = self._lookup(url, whitelist, depth, 'depth')
+        if not found:
+            return None
+        market, ads = found
+        return DepthBook.from_ads(market.side, ads)
+
+    def close(self):
+        pass
+
+
+class SeleniumFetcher(RateFetcher):
+    """
+    Renders the page in a pooled Chrome driver and scrapes the DOM.
+
+    Args:
+        pool (DriverPool): Drivers to check out per lookup.
+        ready_budgets (dict): Seconds per source to wait for the page content.
+        default_budget (float): Ready budget for sources not in `ready_budgets`.
+        page_load_timeouts (dict): Page load/script timeout per source (typically its
+            lookup deadline), applied to the checked-out driver before navigating.
+    """
+
+    name = 'selenium'
+
+    def __init__(self, pool, ready_budgets=None, default_budget=20, page_load_timeouts=None):
+        self.pool = pool
+        self.ready_budgets = ready_budgets or {}
+        self.default_budget = default_budget
+        self.page_load_timeouts = page_load_timeouts or {}
+
+    def _budget(self, market):
+        return self.ready_budgets.get(market.source, self.default_budget)
+
+    def _apply_timeouts(self, entry, market):
+        """Sets the source's page load timeout, if it differs from the one the driver has."""
+        timeout = self.page_load_timeouts.get(market.source)
+        if timeout is not None and entry.page_load_timeout != timeout:
+            set_timeouts(entry.driver, timeout)
+            entry.page_load_timeout = timeout
+
+    def fetch_ads(self, market, whitelist=None, limit=None):
+        debug("Navigating to {}", market.url)
+        with metrics.stage(market.source, 'checkout'):
+            entry = self.pool.checkout()
+        try:
+            driver = entry.driver
+            self._apply_timeouts(entry, market)
+            self._prepare(driver)
+            with metrics.stage(market.source, 'navigate'):
+                driver.get(market.url)
+            return self._extract(driver, market, whitelist, limit)
+        finally:
+            self.pool.checkin(entry)
+
+    def _prepare(self, driver):
+        """Hook run on the checked-out driver before navigating."""
+
+    def _extract(self, driver, market, whitelist, limit):
+        if market.source == BINANCE:
+            return self._binance_ads(driver, market)
+        return self._bybit_ads(driver, market, whitelist, limit)
+
+    def _binance_ads(self, driver, market):
+        # The page headline only shows the best price, without advertiser details.
+        debug("Waiting for the exchange rate element to settle...")
+        with metrics.stage(market.source, 'ready_wait'):
+            price_text = wait_until_ready(driver, css_text_probe(BINANCE_PRICE_SELECTOR), self._budget(market))
+        debug("Extracted Price Text: {} {}", price_text, market.fiat)
+        price = parse_price(price_text)
+        debug("Converted Price: {} {}", price, market.fiat)
+        return [Ad(price=price)]
+
+    def _bybit_ads(self, driver, market, whitelist, limit):
+        debug("Waiting for the ad table to settle...")
+        with metrics.stage(market.source, 'ready_wait'):
+            wait_until_ready(driver, xpath_text_probe(BYBIT_TABLE_XPATH), self._budget(market))
+        with metrics.stage(market.source, 'extract'):
+            rows = extract_bybit_ads(driver, BYBIT_ROWS_XPATH)
+        return advertisers.select(market.source, rows, whitelist, limit)
+
+
+def _request_matches(market, post_data, payload):
+    """True if a captured ad-list request was for this market (or its body is unknown)."""
+    try:
+        request = json.loads(post_data) if post_data else None
+    except ValueError:
+        request = None
+    if not isinstance(request, dict):
+        return True
+    if market.source == BINANCE:
+        wanted = {'asset': market.asset, 'fiat': market.fiat, 'tradeType': market.side}
+    else:
+        wanted = {'tokenId': market.asset, 'currencyId': market.fiat, 'side': '1' if market.side == 'BUY' else '0'}
+    return all(str(request.get(key, value)).upper() == str(value).upper() for key, value in wanted.items())
+
+
+class XhrFetcher(SeleniumFetcher):
+    """
+    Renders the page like SeleniumFetcher but reads the ad list from the JSON response
+    the page fetches for itself, captured from Chrome's performance log (see
+    xhr_capture.py). That yields full depth, advertiser names and limits on both sites,
+    as soon as the request completes. If no matching response arrives within the
+    source's budget, the ads are scraped from the DOM as before.
+
+    The pool's drivers must be created with BrowserProfile(capture_network=True).
+    """
+
+    name = 'xhr'
+
+    ENDPOINTS = {
+        BINANCE: urlparse(BINANCE_API_URL).path,
+        BYBIT: urlparse(BYBIT_API_URL).path,
+    }
+    PARSERS = {}  # filled in below, once the parsers are defined
+
+    def _prepare(self, driver):
+        xhr_capture.drain(driver)
+
+    def _extract(self, driver, market, whitelist, limit):
+        with metrics.stage(market.source, 'xhr_wait'):
+            payload = xhr_capture.wait_for_json(driver, [self.ENDPOINTS[market.source]], self._budget(market),
+                                                match=partial(_request_matches, market))
+        if payload is not None:
+            try:
+                ads = self.PARSERS[market.source](payload)
+            except (RuntimeError, ValueError, KeyError, TypeError) as e:
+                debug("Captured {} ad list could not be parsed: {!r}", market.source, e)
+                ads = []
+            else:
+                debug("Captured {} {} ads from the page's own request", len(ads), market.source)
+            if ads:
+                return advertisers.select(market.source, ads, whitelist, limit)
+        metrics.inc('p2p_xhr_fallback_total', source=market.source)
+        warning("No usable ad list response captured; falling back to the DOM.")
+        return super()._extract(driver, market, whitelist, limit)
+
+
+def _float_or_none(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int_or_none(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _rate_or_none(value):
+    """Completion rate as a 0..1 fraction, whether the site sends 0.985 or 98.5."""
+    rate = _float_or_none(value)
+    if rate is None:
+        return None
+    return rate / 100 if rate > 1 else rate
+
+
+def parse_binance_ads(data):
+    """Converts a Binance adv/search JSON response into Ad records."""
+    ads = []
+    for item in data.get('data') or []:
+        adv = item.get('adv', {})
+        advertiser = item.get('advertiser', {})
+        ads.append(Ad(
+            price=float(adv['price']),
+            advertiser=(advertiser.get('nickName') or '').strip() or None,
+            min_limit=_float_or_none(adv.get('minSingleTransAmount')),
+            max_limit=_float_or_none(adv.get('dynamicMaxSingleTransAmount') or adv.get('maxSingleTransAmount')),
+            available=_float_or_none(adv.get('tradableQuantity') or adv.get('surplusAmount')),
+            payment_methods=[m.get('tradeMethodName') for m in adv.get('tradeMethods') or []],
+            advertiser_id=advertiser.get('userNo'),
+            completion_rate=_rate_or_none(advertiser.get('monthFinishRate')),
+            order_count=_int_or_none(advertiser.get('monthOrderCount')),
+        ))
+    return ads
+
+
+def parse_bybit_ads(data):
+    """Converts a Bybit otc/item/online JSON response into Ad records."""
+    if data.get('ret_code', 0) != 0:
+        raise RuntimeError(f"Bybit API error {data.get('ret_code')}: {data.get('ret_msg')}")
+    ads = []
+    for item in (data.get('result') or {}).get('items') or []:
+        ads.append(Ad(
+            price=float(item['price']),
+            advertiser=(item.get('nickName') or '').strip() or None,
+            min_limit=_float_or_none(item.get('minAmount')),
+            max_limit=_float_or_none(item.get('maxAmount')),
+            available=_float_or_none(item.get('lastQuantity') or item.get('quantity')),
+            payment_methods=list(item.get('payments') or []),
+            advertiser_id=item.get('userId'),
+            completion_rate=_rate_or_none(item.get('recentExecuteRate')),
+            order_count=_int_or_none(item.get('recentOrderNum')),
+        ))
+    return ads
+
+
+class JsonFetcher(RateFetcher):
+    """
+    Queries the sites' ad-list JSON endpoints directly over a pooled requests.Session.
+
+    Args:
+        binance_api_url (str): Override for the Binance search endpoint (e.g. a local stub).
+        bybit_api_url (str): Override for the Bybit OTC endpoint.
+        timeout (float): Per-request timeout in seconds.
+        rows (int): Number of ads requested per page.
+    """
+
+    name = 'json'
+
+    def __init__(self, binance_api_url=BINANCE_API_URL, bybit_api_url=BYBIT_API_URL, timeout=10,
+                 rows=10, pool_size=4):
+        self.binance_api_url = binance_api_url
+        self.bybit_api_url = bybit_api_url
+        self.timeout = timeout
+        self.rows = rows
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'User-Agent': USER_AGENT,
+        })
+
+    def _post(self, url, payload):
+        response = self.session.post(url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def fetch_ads(self, market, whitelist=None, limit=None):
+        debug("Requesting {} ads for {} {}/{}", market.source, market.side, market.asset, market.fiat)
+        with metrics.stage(market.source, 'http'):
+            if market.source == BINANCE:
+                ads = self._binance_ads(market)
+            else:
+                ads = self._bybit_ads(market)
+        return advertisers.select(market.source, ads, whitelist, limit)
+
+    def _binance_ads(self, market):
+        payload = {
+            'asset': market.asset,
+            'fiat': market.fiat,
+            'tradeType': market.side,
+            'page': 1,
+            'rows': self.rows,
+            'payTypes': [],
+            'publisherType': None,
+        }
+        return parse_binance_ads(self._post(self.binance_api_url, payload))
+
+    def _bybit_ads(self, market):
+        payload = {
+            'userId': '',
+            'tokenId': market.asset,
+            'currencyId': market.fiat,
+            'payment': [],
+            'side': '1' if market.side == 'BUY' else '0',
+            'size': str(self.rows),
+            'page': '1',
+            'amount': '',
+            'authMaker': False,
+            'canTrade': False,
+        }
+        return parse_bybit_ads(self._post(self.bybit_api_url, payload))
+
+    def close(self):
+        self.session.close()
+
+
+XhrFetcher.PARSERS = {BINANCE: parse_binance_ads, BYBIT: parse_bybit_ads}
+
+
+def make_fetcher(backend, pool=None, ready_budgets=None, page_load_timeouts=None):
+    """Builds a fetcher by backend name: 'selenium' or 'xhr' (both need a DriverPool) or 'json'."""
+    if backend == 'selenium':
+        return SeleniumFetcher(pool, ready_budgets=ready_budgets, page_load_timeouts=page_load_timeouts)
+    if backend == 'xhr':
+        return XhrFetcher(pool, ready_budgets=ready_budgets, page_load_timeouts=page_load_timeouts)
+    if backend == 'json':
+        return JsonFetcher()
+    raise ValueError(f"Unknown fetcher backend: {backend}")
@@ -0,0 +1,180 @@
+"""
+Threshold-ladder engine with independent alert state per market and per ladder.
+
+A Ladder sorts its (spread_threshold_in_percent, sell_amount) steps once and
+precomputes cumulative tranche sums. Because reaching a threshold also marks every
+threshold below it, the alerted thresholds of a ladder are always a prefix of the
+sorted steps, so a LadderState only needs to remember how many steps have been
+alerted. Evaluating a spread is then one bisect and a comparison.
+
+The LadderEngine keeps one LadderState per (market, ladder name), so an alert on one
+market no longer suppresses the same level on another.
+"""
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+
+from .alerts import RESET_HOUR, should_reset
+
+DEFAULT_LADDER = 'default'
+
+
+class Ladder:
+    """An immutable, sorted threshold ladder with cumulative tranche sums."""
+
+    def __init__(self, steps):
+        steps = sorted(steps)
+        self.steps = steps
+        self.thresholds = array('d', (thr for thr, _ in steps))
+        self.amounts = array('d', (amt for _, amt in steps))
+        self.cumulative = array('d')
+        total = 0.0
+        for amt in self.amounts:
+            total += amt
+            self.cumulative.append(total)
+
+    def reached(self, spread):
+        """Number of thresholds at or below `spread`."""
+        return bisect_right(self.thresholds, spread)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __repr__(self):
+        return f"Ladder({self.steps})"
+
+
+@dataclass
+class LadderHit:
+    """A newly reached threshold; `new_volume` is the tranche volume not alerted before."""
+    market: str
+    ladder: str
+    threshold: float
+    tranche_sell: float
+    cumulative_sell: float
+    new_volume: float
+    spread: float
+
+
+class LadderState:
+    """Alert progress of one ladder on one market, reset daily at `reset_hour`."""
+
+    def __init__(self, ladder, reset_hour=RESET_HOUR):
+        self.ladder = ladder
+        self.reset_hour = reset_hour
+        self.alerted = 0
+        self.last_reset_date = None
+
+    def reset_if_due(self, now):
+        """Clears the alerts if a new day has started after the reset hour; returns True if it did."""
+        if should_reset(now, self.last_reset_date, self.reset_hour):
+            self.alerted = 0
+            self.last_reset_date = now.date()
+            return True
+        return False
+
+    def evaluate(self, spread, now=None):
+        """
+        Returns (threshold, tranche_sell, cumulative_sell, new_volume) for the highest
+        newly reached threshold and marks it and every lower one as alerted, or None.
+        """
+        if now is not None:
+            self.reset_if_due(now)
+        reached = self.ladder.reached(spread)
+        if reached <= self.alerted:
+            return None
+        ladder = self.ladder
+        top = reached - 1
+        previous = ladder.cumulative[self.alerted - 1] if self.alerted else 0.0
+        self.alerted = reached
+        return ladder.thresholds[top], ladder.amounts[top], ladder.cumulative[top], ladder.cumulative[top] - previous
+
+    def restore(self, alerted_up_to, last_reset_date):
+        """Restores persisted progress: every threshold at or below `alerted_up_to` counts as alerted."""
+        self.alerted = self.ladder.reached(alerted_up_to) if alerted_up_to is not None else 0
+        self.last_reset_date = last_reset_date
+
+    @property
+    def highest_alerted(self):
+        return self.ladder.thresholds[self.alerted - 1] if self.alerted else None
+
+    @property
+    def next_threshold(self):
+        """The lowest threshold not yet alerted, or None if the whole ladder has been alerted."""
+        if self.alerted >= len(self.ladder):
+            return None
+        return self.ladder.thresholds[self.alerted]
+
+    @property
+    def alerted_thresholds(self):
+        return list(self.ladder.thresholds[:self.alerted])
+
+
+class LadderEngine:
+    """
+    Evaluates spreads for many markets against named ladders.
+
+    Args:
+        ladders (dict): Maps a ladder name to its list of (threshold, amount) steps.
+        reset_hour (int): Hour of the daily alert reset.
+        on_change (callable, optional): Called as on_change(market, ladder_name, state)
+            whenever a state is reset or alerts a new threshold, e.g. to persist it.
+    """
+
+    def __init__(self, ladders, reset_hour=RESET_HOUR, on_change=None):
+        self.ladders = {name: Ladder(steps) for name, steps in ladders.items()}
+        self.reset_hour = reset_hour
+        self.on_change = on_change
+        self.markets = {}  # market -> {ladder name: LadderState}
+
+    def _changed(self, market, name, state):
+        if self.on_change is not None:
+            self.on_change(market, name, state)
+
+    def add_market(self, market, ladder_names=(DEFAULT_LADDER,)):
+        states = self.markets.setdefault(market, {})
+        for name in ladder_names:
+            if name not in states:
+                states[name] = LadderState(self.ladders[name], self.reset_hour)
+        return states
+
+    def reset_if_due(self, now=None):
+        """Applies the daily reset to every market; returns the markets that were reset."""
+        now = now or datetime.now()
+        reset = []
+        for market, states in self.markets.items():
+            market_reset = False
+            for name, state in states.items():
+                if state.reset_if_due(now):
+                    self._changed(market, name, state)
+                    market_reset = True
+            if market_reset:
+                reset.append(market)
+        return reset
+
+    def evaluate(self, market, spread, now=None):
+        """Returns a LadderHit for every ladder of `market` whose next threshold `spread` reached."""
+        states = self.markets.get(market) or self.add_market(market)
+        hits = []
+        for name, state in states.items():
+            reset = now is not None and state.reset_if_due(now)
+            hit = state.evaluate(spread)
+            if hit:
+                hits.append(LadderHit(market, name, *hit, spread=spread))
+            if hit or reset:
+                self._changed(market, name, state)
+        return hits
+
+    def next_threshold(self, market):
+        """The lowest unalerted threshold across the market's ladders, or None."""
+        thresholds = [state.next_threshold for state in self.markets.get(market, {}).values()]
+        thresholds = [thr for thr in thresholds if thr is not None]
+        return min(thresholds) if thresholds else None
+
+    def evaluate_many(self, spreads, now=None):
+        """Evaluates a {market: spread} mapping; returns all hits."""
+        hits = []
+        for market, spread in spreads.items():
+            hits.extend(self.evaluate(market, spread, now))
+        return hits
@@ -0,0 +1,181 @@
+"""
+Low-overhead structured logging for the monitors.
+
+    log("Fetched {} quotes in {:.2f}s", len(quotes), elapsed)      # INFO
+    debug("Navigating to {}", url)                                 # DEBUG
+    error("Check of {} failed: {}", name, exc, market=name)        # ERROR, extra fields
+
+Messages are format templates with their arguments passed separately; they are only
+formatted if the event is actually written, so a suppressed call costs a level
+comparison. Events at or above `level` are put on a queue and written by a background
+thread, to stdout as plain lines and optionally as JSON lines to a file, so a slow
+console never stalls a scrape or an alert.
+
+Independently of the output level, the last `ring_size` events at or above
+`ring_level` are kept unformatted in an in-memory ring buffer. Logging an ERROR dumps
+the buffered events that were not written out (oldest first) before the error itself, which gives the context that led
+to a failure without having to run with debug output on. Call `flush()` to wait
+for queued events, e.g. before exiting.
+"""
+import atexit
+import json
+import sys
+import threading
+import time
+from collections import deque
+from queue import SimpleQueue
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+_level = INFO
+_ring_level = DEBUG
+_ring = deque(maxlen=1000)
+_json_file = None
+_console = True
+_queue = SimpleQueue()
+_writer = None
+_writer_lock = threading.Lock()
+_DUMP = object()
+_FLUSH = object()
+
+
+def _format(message, args):
+    if not args:
+        return message
+    try:
+        return message.format(*args)
+    except (IndexError, KeyError, ValueError):
+        return f"{message} {args!r}"
+
+
+def _write(record, prefix=''):
+    ts, level, message, args, fields, thread = record
+    text = _format(message, args)
+    if _console:
+        line = text if level <= INFO and not prefix else f"{prefix}{LEVEL_NAMES[level]}: {text}"
+        sys.stdout.write(line + '\n')
+    if _json_file is not None:
+        entry = {'ts': round(ts, 6), 'level': LEVEL_NAMES[level], 'msg': text, 'thread': thread}
+        if prefix:
+            entry['replayed'] = True
+        if fields:
+            entry.update({key: value if isinstance(value, (int, float, str, bool, type(None))) else str(value)
+                          for key, value in fields.items()})
+        _json_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def _run():
+    while True:
+        item = _queue.get()
+        try:
+            if isinstance(item, tuple) and item[0] is _FLUSH:
+                sys.stdout.flush()
+                if _json_file is not None:
+                    _json_file.flush()
+                item[1].set()
+            elif isinstance(item, tuple) and item[0] is _DUMP:
+                for record in item[1]:
+                    _write(record, prefix='[recent] ')
+            else:
+                _write(item)
+        except Exception:
+            pass  # logging must never take the monitor down
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_run, name='log-writer', daemon=True)
+            _writer.start()
+
+
+def emit(level, message, args=(), fields=None):
+    """Records one event; the other helpers are shorthands for this."""
+    if level < _ring_level and level < _level:
+        return
+    record = (time.time(), level, message, args, fields, threading.current_thread().name)
+    if level >= _ring_level:
+        _ring.append(record)
+    if level < _level:
+        return
+    if _writer is None:
+        _ensure_writer()
+    if level >= ERROR:
+        # Only the context that was not written out already.
+        recent = [event for event in list(_ring)[:-1] if event[1] < _level]
+        _ring.clear()
+        if recent:
+            _queue.put((_DUMP, recent))
+    _queue.put(record)
+
+
+def debug(message, *args, **fields):
+    if DEBUG >= _ring_level or DEBUG >= _level:
+        emit(DEBUG, message, args, fields)
+
+
+def log(message, *args, **fields):
+    """INFO event; kept under this name since every module already logs through it."""
+    if INFO >= _ring_level or INFO >= _level:
+        emit(INFO, message, args, fields)
+
+
+info = log
+
+
+def warning(message, *args, **fields):
+    emit(WARNING, message, args, fields)
+
+
+def error(message, *args, **fields):
+    emit(ERROR, message, args, fields)
+
+
+def recent_events():
+    """The ring buffer's events as formatted strings, oldest first."""
+    return [f"{LEVEL_NAMES[level]} {_format(message, args)}" for _, level, message, args, _, _ in list(_ring)]
+
+
+def flush(timeout=5):
+    """Waits until every queued event has been written."""
+    if _writer is None:
+        return True
+    done = threading.Event()
+    _queue.put((_FLUSH, done))
+    return done.wait(timeout)
+
+
+def configure(level=None, verbose=None, json_path=None, ring_size=None, ring_level=None, console=None):
+    """
+    Sets up the pipeline; unspecified settings keep their current value.
+
+    Args:
+        level (str or int): Lowest level written out ('DEBUG', 'INFO', 'WARNING', 'ERROR').
+        verbose (bool): Shorthand for level INFO (True) or WARNING (False).
+        json_path (str): Also append events as JSON lines to this file.
+        ring_size (int): Events kept for the dump on error.
+        ring_level (str or int): Lowest level kept in the ring buffer.
+        console (bool): Write events to stdout.
+    """
+    global _level, _ring_level, _ring, _json_file, _console
+    if verbose is not None:
+        _level = INFO if verbose else WARNING
+    if level is not None:
+        _level = LEVELS[level.upper()] if isinstance(level, str) else level
+    if ring_level is not None:
+        _ring_level = LEVELS[ring_level.upper()] if isinstance(ring_level, str) else ring_level
+    if ring_size is not None:
+        _ring = deque(_ring, maxlen=ring_size)
+    if console is not None:
+        _console = console
+    if json_path is not None:
+        flush()
+        if _json_file is not None:
+            _json_file.close()
+        _json_file = open(json_path, 'a', encoding='utf-8', buffering=1 << 16) if json_path else None
+
+
+atexit.register(flush)
@@ -0,0 +1,232 @@
+"""
+Per-stage latency and resource metrics, exposed in the Prometheus text format.
+
+Instrumented code wraps each stage of a lookup in `stage(source, name)`:
+
+    with metrics.stage(market.source, 'navigate'):
+        driver.get(market.url)
+
+which records its duration into a `p2p_stage_seconds` histogram labelled by source and
+stage. Failures and empty results are counted with `inc()`, and gauges (Chrome RSS, ...)
+are read from collector callbacks when the endpoint is scraped.
+
+Metrics are off by default. While disabled, `stage()` returns a shared no-op context
+manager and `inc()` returns immediately, so the instrumentation costs one global lookup
+per call. `enable()` turns recording on and `serve(port)` starts a local HTTP endpoint
+(http://127.0.0.1:<port>/metrics) on a daemon thread.
+"""
+import bisect
+import threading
+import time
+
+from .common import log, warning
+
+ENABLED = False
+
+# Histogram bucket upper bounds in seconds, from a JSON round trip to a slow page load.
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values."""
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Thread-safe store of counters, histograms and gauge collectors."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}    # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> Histogram
+        self.gauges = {}      # (name, labels) -> value
+        self.collectors = []  # callables run before rendering
+        self.help = {}
+
+    def inc(self, name, labels=(), amount=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def set(self, name, labels, value):
+        with self._lock:
+            self.gauges[(name, labels)] = value
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        for collector in list(self.collectors):
+            try:
+                collector(self)
+            except Exception as e:
+                warning("Metrics collector failed: {}", e)
+        lines = []
+        with self._lock:
+            for kind, metrics in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted({name for name, _ in metrics}):
+                    if name in self.help:
+                        lines.append(f"# HELP {name} {self.help[name]}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (metric, labels), value in sorted(metrics.items()):
+                        if metric == name:
+                            lines.append(f"{name}{_label_text(labels)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        le = bound if bound == '+Inf' else f"{bound:g}"
+                        lines.append(f"{name}_bucket{_label_text(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_label_text(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_label_text(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+REGISTRY.help.update({
+    'p2p_stage_seconds': "Duration of each lookup stage, by source and stage.",
+    'p2p_fetch_total': "Lookups attempted, by source.",
+    'p2p_fetch_failures_total': "Lookups that raised, by source and exception type.",
+    'p2p_fetch_empty_total': "Lookups that returned no price (None), by source.",
+    'p2p_chrome_rss_bytes': "Resident memory of each pooled chromedriver and its Chrome children.",
+})
+
+
+# ----------------------------- Recording -----------------------------
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('labels', 'start')
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        REGISTRY.observe('p2p_stage_seconds', self.labels, time.perf_counter() - self.start)
+        return False
+
+
+def stage(source, name):
+    """Context manager timing one stage of a lookup; a no-op while metrics are disabled."""
+    if not ENABLED:
+        return _NULL_STAGE
+    return _Stage((('source', source), ('stage', name)))
+
+
+def inc(name, amount=1, **labels):
+    """Increments a counter; a no-op while metrics are disabled."""
+    if ENABLED:
+        REGISTRY.inc(name, tuple(sorted(labels.items())), amount)
+
+
+def set_gauge(name, value, **labels):
+    """Sets a gauge; a no-op while metrics are disabled."""
+    if ENABLED:
+        REGISTRY.set(name, tuple(sorted(labels.items())), value)
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+# ----------------------------- Process memory -----------------------------
+
+def process_tree_rss(pid):
+    """Total resident memory in bytes of a process and all its descendants (0 if unknown)."""
+    from .watchdog import tree_rss
+    return tree_rss(pid)
+
+
+def chrome_rss_collector(pool):
+    """Returns a collector reporting the RSS of every live driver in a DriverPool."""
+    def collect(registry):
+        pids = pool.driver_pids()
+        with registry._lock:
+            for key in [key for key in registry.gauges if key[0] == 'p2p_chrome_rss_bytes']:
+                del registry.gauges[key]
+        for pid in pids:
+            registry.set('p2p_chrome_rss_bytes', (('pid', pid),), process_tree_rss(pid))
+    return collect
+
+
+# ----------------------------- HTTP endpoint -----------------------------
+
+def serve(port, host='127.0.0.1'):
+    """Enables metrics and serves them on http://host:port/metrics from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep scrapes out of the monitor's console output
+
+    enable()
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    log("Serving metrics on http://{}:{}/metrics", host, server.server_address[1])
+    return server
@@ -0,0 +1,380 @@
+"""
+Config-driven monitor running every market in one process.
+
+All markets share one driver pool, one fetcher per source and one tick store. Each
+market is polled on its own schedule (fixed, or adapted to its distance from the next
+trigger by scheduler.py); whenever markets are due, the legs of all of them
+are fetched concurrently in a single batch (a URL shared by several markets is fetched
+once), then each market's spread or price is evaluated and alerted.
+
+Usage:
+    python -m p2p.monitor --config markets.json [--market "Binance PGK/USDT" ...]
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+from functools import partial
+
+from . import advertisers, logs, metrics
+from .browser import create_chrome_driver
+from .common import debug, error, log, warning
+from .concurrent_fetch import fetch_quotes, leg_skew
+from .config import load_config
+from .depth import describe_executable_spread
+from .discord import DiscordNotifier
+from .driver_pool import DriverPool
+from .feed import TickFeed, serve_feed
+from .fetchers import make_fetcher
+from .ladder import LadderEngine
+from .ratecache import CachedFetcher
+from .resilience import ResilientFetcher
+from .scheduler import AdaptiveScheduler
+from .state import StateJournal
+from .tickstore import TickStore
+from .watchdog import ChromeWatchdog
+
+# markets.json next to the p2p package, unless P2P_CONFIG points elsewhere (e.g. once installed).
+DEFAULT_CONFIG_PATH = os.environ.get(
+    'P2P_CONFIG', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'markets.json'))
+
+
+def build_fetchers(config, pool, on_circuit_change=None):
+    """One ResilientFetcher per configured source, around the source's backend."""
+    rules = config.advertisers
+    advertisers.configure(min_completion_rate=rules.min_completion_rate, min_orders=rules.min_orders,
+                          cache_size=rules.profile_cache_size, profile_ttl=rules.profile_ttl)
+    budgets = {source: cfg.ready_budget for source, cfg in config.sources.items()}
+    # An abandoned attempt stuck on a hung page holds its driver until the page load times out.
+    timeouts = {source: cfg.deadline for source, cfg in config.sources.items()}
+    return {
+        source: ResilientFetcher(make_fetcher(cfg.backend, pool=pool, ready_budgets=budgets,
+                                              page_load_timeouts=timeouts), source,
+                                 deadline=cfg.deadline, hedge=cfg.hedge, hedge_min_delay=cfg.hedge_min_delay,
+                                 failures=cfg.breaker_failures, cooldown=cfg.breaker_cooldown,
+                                 on_change=on_circuit_change)
+        for source, cfg in config.sources.items()
+    }
+
+
+class Monitor:
+    """
+    Runs the markets of a MonitorConfig.
+
+    Args:
+        config (MonitorConfig): Loaded configuration.
+        market_names (list, optional): Only run these markets (default: every enabled market).
+    """
+
+    def __init__(self, config, market_names=None):
+        self.config = config
+        logs.configure(level=config.log_level or None, verbose=None if config.log_level else config.verbose,
+                       json_path=config.log_json_path, ring_size=config.log_ring_size)
+        self.markets = [m for m in config.markets if market_names is None or m.name in market_names]
+        if market_names is not None:
+            missing = set(market_names) - {m.name for m in self.markets}
+            if missing:
+                raise KeyError(f"Unknown market(s): {', '.join(sorted(missing))}")
+        self.pool = DriverPool(partial(create_chrome_driver, config.chromedriver_path, config.browser_profile()),
+                               size=config.driver_pool_size, max_uses=config.driver_max_uses)
+        self.fetchers = build_fetchers(config, self.pool, on_circuit_change=self.report_circuit)
+        if config.rate_cache_url:
+            # A stalled daemon must not hold the cycle longer than a direct lookup would.
+            self.fetchers = {source: CachedFetcher(config.rate_cache_url, fallback=fetcher,
+                                                   timeout=config.sources[source].deadline)
+                             for source, fetcher in self.fetchers.items()}
+        self.ladders = LadderEngine(config.ladders)
+        for market in self.markets:
+            if market.type == 'spread':
+                self.ladders.add_market(market.name, [market.ladder])
+        self.arbitrage = self._init_arbitrage(config.arbitrage) if config.arbitrage.enabled else None
+        self.journal = StateJournal(config.state_path)
+        self.journal.restore(self.ladders)
+        self.ladders.on_change = self.journal.record
+        self.store = TickStore(config.tick_store_dir)
+        self.notifier = DiscordNotifier(config.discord_webhook_url, coalesce_window=config.discord_coalesce_window)
+        self.scheduler = AdaptiveScheduler(
+            {source: (cfg.min_interval, cfg.max_interval) for source, cfg in config.sources.items()}
+        )
+        self.next_due = {market.name: 0.0 for market in self.markets}
+        self.last_values = {}  # market -> spread or price of its latest check (None if it failed)
+        self.watchdog = None
+        if config.watchdog_interval and any(cfg.backend != 'json' for cfg in config.sources.values()):
+            self.watchdog = ChromeWatchdog(self.pool, max_rss=int(config.driver_max_rss_mb * 2**20),
+                                           interval=config.watchdog_interval).start()
+        self.feed = self.feed_server = None
+        if config.feed_port:
+            self.feed = TickFeed()
+            self.feed_server = serve_feed(self.feed, config.feed_port)
+        self.metrics_server = None
+        if config.metrics_port:
+            self.metrics_server = metrics.serve(config.metrics_port)
+            metrics.REGISTRY.collectors.append(metrics.chrome_rss_collector(self.pool))
+
+    # ----------------------------- Fetching -----------------------------
+
+    def report_circuit(self, source, state, reason):
+        """Tells Discord when a source is being skipped, and when it recovers."""
+        if state == 'open':
+            self.notifier.send(f"{source} lookups are failing and will be skipped for now: {reason}")
+        elif state == 'closed':
+            self.notifier.send(f"{source} lookups have recovered.")
+
+    @staticmethod
+    def leg_key(market, leg):
+        whitelist = ','.join(leg.whitelist) if leg.whitelist else ''
+        return f"{market.source}|{leg.url}|{whitelist}"
+
+    def build_jobs(self, markets):
+        """One fetch job per distinct (source, URL, whitelist) across the given markets."""
+        jobs = {}
+        for market in markets:
+            fetcher = self.fetchers[market.source]
+            for leg in market.legs.values():
+                fetch = partial(fetcher.get_book, whitelist=leg.whitelist, depth=self.config.depth_levels)
+                jobs.setdefault(self.leg_key(market, leg), (fetch, leg.url))
+        return jobs
+
+    # ----------------------------- Evaluation -----------------------------
+
+    def record_ticks(self, market, ticks, spread=float('nan')):
+        """Stores (side, price) ticks; storage errors never stop the monitor."""
+        ts = time.time()
+        try:
+            for side, price in ticks:
+                self.store.append(market.name, side, price=price, spread=spread, ts=ts)
+        except Exception as e:
+            error("Failed to store ticks for {}: {}", market.name, e)
+
+    def check_spread(self, market, quotes):
+        """Computes the spread between the sell and buy legs and processes its alerts."""
+        sell_quote = quotes[self.leg_key(market, market.legs['SELL'])]
+        buy_quote = quotes[self.leg_key(market, market.legs['BUY'])]
+        rate_sell, rate_buy = sell_quote.price, buy_quote.price
+        if rate_sell is None or rate_buy is None:
+            warning("Failed to extract one or both {} rates. Skipping this check.", market.name)
+            return None
+        spread = ((rate_sell - rate_buy) / rate_buy) * 100
+        log("{}: Sell: {} {}, Buy: {} {}, Spread: {:.2f}% (legs {:.2f}s apart)", market.name, rate_sell,
+            market.fiat, rate_buy, market.fiat, spread, leg_skew(sell_quote, buy_quote),
+            market=market.name, spread=spread)
+        self.record_ticks(market, [('SELL', rate_sell), ('BUY', rate_buy)], spread)
+        details = f"{market.name} Rates: Sell: {rate_sell} {market.fiat}, Buy: {rate_buy} {market.fiat}"
+        self.process_alerts(market, spread, details, (sell_quote.book, buy_quote.book))
+        if self.feed is not None:
+            ladders = {name: {'alerted_up_to': state.highest_alerted, 'next_threshold': state.next_threshold}
+                       for name, state in self.ladders.markets.get(market.name, {}).items()}
+            self.feed.publish(market.name, type='spread', source=market.source, fiat=market.fiat,
+                              sell=rate_sell, buy=rate_buy, spread=spread, ladders=ladders,
+                              leg_skew=leg_skew(sell_quote, buy_quote))
+        return spread
+
+    def process_alerts(self, market, spread, details, books=None):
+        """
+        Sends an alert for every ladder of the market whose next threshold the spread reached.
+        If (sell_book, buy_book) depth is given, the alert also reports the spread achievable
+        for the cumulative sell amount.
+        """
+        hits = self.ladders.evaluate(market.name, spread, datetime.now())
+        if not hits:
+            debug("{}: Spread below new alert thresholds or already alerted.", market.name)
+            return
+        for hit in hits:
+            message = (
+                f"Alert! {market.name} spread detected.\n"
+                f"{details}\n"
+                f"Spread: {spread:.2f}%\n"
+                f"New threshold reached: {hit.threshold}%\n"
+                f"Tranche sell: {hit.tranche_sell:g}, Cumulative sell: {hit.cumulative_sell:g}"
+            )
+            if books is not None:
+                message += "\n" + describe_executable_spread(*books, hit.cumulative_sell)
+            self.notifier.send(message)
+
+    def check_price(self, market, quotes):
+        """Alerts on every poll while the best price is at or above the market's threshold."""
+        (side, leg), = market.legs.items()
+        price = quotes[self.leg_key(market, leg)].price
+        if price is None:
+            warning("{}: Failed to extract {} price.", market.name, side.lower())
+            return None
+        log("{}: {} Price: {} {} per {}", market.name, side.title(), price, market.fiat, market.asset)
+        self.record_ticks(market, [(side, price)])
+        if price >= market.threshold:
+            message = (
+                f"Alert! {side.title()} order detected with price {price} {market.fiat} per {market.asset}, "
+                f"which meets/exceeds the threshold of {market.threshold}."
+            )
+            self.notifier.send(message)
+        else:
+            debug("{}: {} price is below the threshold.", market.name, side.title())
+        if self.feed is not None:
+            self.feed.publish(market.name, type='price', source=market.source, fiat=market.fiat, side=side,
+                              price=price, threshold=market.threshold, alerting=price >= market.threshold)
+        return price
+
+    # ----------------------------- Arbitrage -----------------------------
+
+    def _init_arbitrage(self, cfg):
+        """Builds the cross-venue matrix and registers a ladder for every (buy venue, sell venue) pair."""
+        # Imported here so NumPy is only loaded when the arbitrage matrix is enabled.
+        from .arbitrage import ArbitrageMatrix, FxRates, Opportunity, venue_name
+
+        matrix = ArbitrageMatrix(FxRates(cfg.quote_currency, cfg.fx_ttl, cfg.fx_url, cfg.fx_static),
+                                 cfg.max_quote_age)
+        venues = sorted({(m.source, m.fiat) for m in self.markets if m.asset == cfg.asset})
+        for buy in venues:
+            for sell in venues:
+                if buy != sell:
+                    pair = Opportunity(venue_name(*buy), venue_name(*sell), 0.0, 0.0, 0.0)
+                    self.ladders.add_market(pair.name, [cfg.ladder])
+        return matrix
+
+    def check_arbitrage(self, markets, quotes):
+        """Feeds the cycle's quotes into the cross-venue matrix and alerts its best spreads."""
+        cfg = self.config.arbitrage
+        self.arbitrage.refresh_fx()
+        for market in markets:
+            if market.asset != cfg.asset:
+                continue
+            for side, leg in market.legs.items():
+                quote = quotes[self.leg_key(market, leg)]
+                self.arbitrage.update(market.source, market.fiat, side, quote.price, quote.fetched_at)
+        best = self.arbitrage.best(cfg.top_n)
+        now = datetime.now()
+        for opportunity in best:
+            if opportunity.name not in self.ladders.markets:
+                self.ladders.add_market(opportunity.name, [cfg.ladder])
+            for hit in self.ladders.evaluate(opportunity.name, opportunity.spread, now):
+                buy_fiat = opportunity.buy_venue.rsplit(' ', 1)[-1]
+                sell_fiat = opportunity.sell_venue.rsplit(' ', 1)[-1]
+                self.notifier.send(
+                    f"Alert! Cross-venue {cfg.asset} spread detected.\n"
+                    f"Buy on {opportunity.buy_venue} at {opportunity.ask} {buy_fiat}, "
+                    f"sell on {opportunity.sell_venue} at {opportunity.bid} {sell_fiat}\n"
+                    f"Spread ({cfg.quote_currency} terms): {opportunity.spread:.2f}%\n"
+                    f"New threshold reached: {hit.threshold}%\n"
+                    f"Tranche sell: {hit.tranche_sell:g}, Cumulative sell: {hit.cumulative_sell:g}"
+                )
+        if self.feed is not None:
+            self.feed.publish('arbitrage', type='arbitrage', quote_currency=cfg.quote_currency,
+                              best=[dict(opportunity.__dict__, name=opportunity.name) for opportunity in best])
+        return best
+
+    def check_market(self, market, quotes):
+        if market.type == 'spread':
+            return self.check_spread(market, quotes)
+        return self.check_price(market, quotes)
+
+    # ----------------------------- Scheduling -----------------------------
+
+    def next_interval(self, market, value, now):
+        """Seconds until the market's next poll, given the value its check just returned."""
+        if not self.config.adaptive_polling:
+            return market.interval
+        if market.type == 'spread':
+            target = self.ladders.next_threshold(market.name)
+        else:
+            target = market.threshold
+        return self.scheduler.interval(market.name, market.source, value, target, market.interval, now)
+
+    def due_markets(self, now):
+        return [market for market in self.markets if self.next_due[market.name] <= now]
+
+    def run_cycle(self):
+        """Fetches and evaluates every market that is due; returns the markets checked."""
+        now = time.time()
+        due = self.due_markets(now)
+        if not due:
+            return []
+        with metrics.stage('monitor', 'cycle'):
+            for name in self.ladders.reset_if_due(datetime.now()):
+                log("{}: alerts reset for the new day.", name)
+            quotes = fetch_quotes(self.build_jobs(due), max_in_flight=self.config.max_in_flight)
+            with metrics.stage('monitor', 'evaluate'):
+                for market in due:
+                    value = None
+                    try:
+                        value = self.check_market(market, quotes)
+                    except Exception as e:
+                        error("An error occurred while checking {}: {}", market.name, e, market=market.name)
+                    self.last_values[market.name] = value
+                    self.next_due[market.name] = now + self.next_interval(market, value, now)
+                if self.arbitrage is not None:
+                    try:
+                        self.check_arbitrage(due, quotes)
+                    except Exception as e:
+                        error("An error occurred while checking cross-venue spreads: {}", e)
+        return due
+
+    def seconds_until_due(self):
+        return max(0.0, min(self.next_due.values()) - time.time())
+
+    def run(self):
+        log("Starting monitor for {} market(s): {}", len(self.markets), ', '.join(m.name for m in self.markets))
+        while True:
+            self.run_cycle()
+            delay = self.seconds_until_due()
+            debug("Waiting for {:.0f} seconds before the next check...", delay)
+            time.sleep(delay)
+
+    def close(self):
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+        if self.feed_server is not None:
+            self.feed_server.shutdown()
+        self.notifier.close()
+        for fetcher in self.fetchers.values():
+            fetcher.close()
+        self.pool.close()
+        self.store.close()
+        self.journal.close()
+
+
+def run_monitor(config_path=DEFAULT_CONFIG_PATH, market_names=None):
+    """Loads the config and runs the monitor until interrupted."""
+    monitor = Monitor(load_config(config_path), market_names)
+    try:
+        monitor.run()
+    finally:
+        monitor.close()
+        logs.flush()
+
+
+def check_once(config_path=DEFAULT_CONFIG_PATH, market_names=None):
+    """
+    Checks every market once, sends any alerts and returns {market: value}; for cron-style use.
+    Alert state is persisted as usual, so repeated runs do not repeat ladder alerts.
+    """
+    monitor = Monitor(load_config(config_path), market_names)
+    try:
+        monitor.run_cycle()
+        return dict(monitor.last_values)
+    finally:
+        monitor.close()
+        logs.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the configured P2P/OTC rate monitors.")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help="Path to markets.json")
+    parser.add_argument('--market', action='append', help="Only run this market (repeatable)")
+    args = parser.parse_args(argv)
+    run_monitor(args.config, args.market)
+
+
+def check_once_main(argv=None):
+    parser = argparse.ArgumentParser(description="Check every configured market once and exit.")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help="Path to markets.json")
+    parser.add_argument('--market', action='append', help="Only check this market (repeatable)")
+    args = parser.parse_args(argv)
+    values = check_once(args.config, args.market)
+    for name, value in values.items():
+        print(f"{name}\t{'failed' if value is None else f'{value:.4f}'}")
+    return 0 if values and all(value is not None for value in values.values()) else 1
+
+
+if __name__ == "__main__":
+    main()
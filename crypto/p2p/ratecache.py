@@ -0,0 +1,340 @@
+"""
+Shared local rate cache, so several monitors watching the same page cost one scrape.
+
+`python -m p2p.ratecache` runs a small daemon on localhost that owns the fetchers
+(built from markets.json like the monitor's). It keeps the latest ads per
+(URL, whitelist, depth) for `ttl` seconds and collapses concurrent requests for the
+same key into a single fetch. Every monitor whose config sets `rate_cache_url`
+queries it through CachedFetcher, and falls back to fetching on its own while the
+daemon is unreachable.
+
+Endpoints:
+    GET /ads?url=...&whitelist=a,b&limit=10   latest snapshot as JSON
+    GET /subscribe?url=...&whitelist=...&limit=...
+        Server-Sent Events stream; every new snapshot of the key is pushed as it is
+        fetched, and subscribed keys are refreshed by the daemon every `ttl` seconds.
+    GET /stats                                hits, misses, fetches and keys
+
+Localhost HTTP rather than a Unix socket, so the same setup works on Windows.
+"""
+import argparse
+import json
+import threading
+import time
+from dataclasses import asdict
+from queue import Queue, Empty, Full
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from .advertisers import PROFILES, normalize_name
+from .ads import Ad
+from .common import log, warning
+from .fetchers import RateFetcher, parse_market_url
+
+DEFAULT_PORT = 8765
+DEFAULT_TTL = 10.0
+
+
+def cache_key(url, whitelist, limit):
+    # Whitelists that only differ in spelling variants of the same names share a snapshot.
+    names = tuple(sorted({normalize_name(name) for name in whitelist} - {''})) if whitelist else ()
+    return url, names, limit or 0
+
+
+class _Flight:
+    """One in-progress fetch that concurrent callers of the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RateCache:
+    """
+    TTL cache of fetched ads with single-flight fetching and change subscribers.
+
+    Args:
+        fetchers (dict): Maps a source name to the RateFetcher used for its pages.
+        ttl (float): Seconds a snapshot is served before it is fetched again.
+    """
+
+    def __init__(self, fetchers, ttl=DEFAULT_TTL):
+        self.fetchers = fetchers
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshots = {}  # key -> (fetched_at, [Ad])
+        self._flights = {}    # key -> _Flight
+        self._subscribers = {}  # key -> set of Queue
+        self.stats = {'hits': 0, 'misses': 0, 'fetches': 0, 'collapsed': 0, 'errors': 0}
+
+    def get(self, url, whitelist=None, limit=None, max_age=None):
+        """Returns (fetched_at, ads) for the key, fetching at most once at a time per key."""
+        key = cache_key(url, whitelist, limit)
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and time.time() - snapshot[0] <= max_age:
+                self.stats['hits'] += 1
+                return snapshot
+            self.stats['misses'] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.stats['collapsed'] += 1
+        if leader:
+            self._fetch(key, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def _fetch(self, key, flight):
+        url, whitelist, limit = key
+        try:
+            market = parse_market_url(url)
+            ads = self.fetchers[market.source].fetch_ads(market, whitelist=list(whitelist) or None,
+                                                         limit=limit or None)
+            flight.result = (time.time(), ads)
+        except Exception as e:
+            flight.error = e
+        with self._lock:
+            self.stats['fetches'] += 1
+            del self._flights[key]
+            if flight.error is None:
+                self._snapshots[key] = flight.result
+                subscribers = list(self._subscribers.get(key, ()))
+            else:
+                self.stats['errors'] += 1
+                subscribers = []
+        flight.done.set()
+        for queue in subscribers:
+            self._push(queue, flight.result)
+
+    @staticmethod
+    def _push(queue, snapshot):
+        """Delivers a snapshot, dropping the oldest one if the subscriber is behind."""
+        while True:
+            try:
+                queue.put_nowait(snapshot)
+                return
+            except Full:
+                try:
+                    queue.get_nowait()
+                except Empty:
+                    pass
+
+    def subscribe(self, url, whitelist=None, limit=None, backlog=8):
+        """Returns (key, queue) receiving every new snapshot of the key."""
+        key = cache_key(url, whitelist, limit)
+        queue = Queue(maxsize=backlog)
+        with self._lock:
+            self._subscribers.setdefault(key, set()).add(queue)
+            snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            queue.put_nowait(snapshot)
+        return key, queue
+
+    def unsubscribe(self, key, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[key]
+
+    def refresh_subscribed(self):
+        """Fetches every subscribed key whose snapshot is older than the TTL."""
+        with self._lock:
+            keys = list(self._subscribers)
+        for url, whitelist, limit in keys:
+            try:
+                self.get(url, list(whitelist), limit)
+            except Exception as e:
+                warning("Rate cache: refresh of {} failed: {}", url, e)
+
+    def summary(self):
+        with self._lock:
+            return dict(self.stats, keys=len(self._snapshots),
+                        subscribers=sum(len(s) for s in self._subscribers.values()),
+                        advertiser_profiles=PROFILES.summary())
+
+
+# ----------------------------- Server -----------------------------
+
+def _snapshot_json(snapshot):
+    fetched_at, ads = snapshot
+    return json.dumps({'fetched_at': fetched_at, 'ads': [asdict(ad) for ad in ads]})
+
+
+def _query(path):
+    params = parse_qs(urlparse(path).query)
+    url = params.get('url', [None])[0]
+    whitelist = [name for name in params.get('whitelist', [''])[0].split(',') if name]
+    limit = int(params.get('limit', ['0'])[0]) or None
+    max_age = float(params['max_age'][0]) if 'max_age' in params else None
+    return url, whitelist, limit, max_age
+
+
+def make_server(cache, port=DEFAULT_PORT, host='127.0.0.1'):
+    """Returns a ThreadingHTTPServer serving `cache` (call serve_forever to run it)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def _send(self, status, body, content_type='application/json'):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            route = urlparse(self.path).path
+            if route == '/stats':
+                self._send(200, json.dumps(cache.summary()))
+                return
+            url, whitelist, limit, max_age = _query(self.path)
+            if route not in ('/ads', '/subscribe') or not url:
+                self._send(404, json.dumps({'error': 'unknown route or missing url'}))
+            elif route == '/ads':
+                try:
+                    self._send(200, _snapshot_json(cache.get(url, whitelist, limit, max_age)))
+                except Exception as e:
+                    self._send(502, json.dumps({'error': f"{type(e).__name__}: {e}"}))
+            else:
+                self._stream(url, whitelist, limit)
+
+        def _stream(self, url, whitelist, limit):
+            key, queue = cache.subscribe(url, whitelist, limit)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            try:
+                while True:
+                    try:
+                        snapshot = queue.get(timeout=15)
+                        message = f"data: {_snapshot_json(snapshot)}\n\n"
+                    except Empty:
+                        message = ": keep-alive\n\n"
+                    self.wfile.write(message.encode('utf-8'))
+                    self.wfile.flush()
+            except OSError:
+                pass  # subscriber went away
+            finally:
+                cache.unsubscribe(key, queue)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def run_daemon(cache, port=DEFAULT_PORT, host='127.0.0.1'):
+    """Serves the cache and refreshes subscribed keys until interrupted."""
+    server = make_server(cache, port, host)
+    threading.Thread(target=server.serve_forever, name='rate-cache-http', daemon=True).start()
+    log("Rate cache listening on http://{}:{} (ttl {:g}s)", host, server.server_address[1], cache.ttl)
+    try:
+        while True:
+            cache.refresh_subscribed()
+            time.sleep(max(1.0, cache.ttl / 2))
+    finally:
+        server.shutdown()
+
+
+# ----------------------------- Client -----------------------------
+
+class CachedFetcher(RateFetcher):
+    """
+    Fetches ads through a rate cache daemon, falling back to `fallback` when it is down
+    or does not answer within `timeout`.
+
+    Args:
+        base_url (str): The daemon, e.g. http://127.0.0.1:8765.
+        fallback (RateFetcher, optional): Fetcher used while the daemon is unreachable.
+        timeout (float): Seconds to wait for the daemon, which includes its fetch time;
+            keep it within the source's lookup deadline.
+    """
+
+    name = 'cache'
+
+    def __init__(self, base_url, fallback=None, timeout=40):
+        self.base_url = base_url.rstrip('/')
+        self.fallback = fallback
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def fetch_ads(self, market, whitelist=None, limit=None):
+        params = {'url': market.url, 'whitelist': ','.join(whitelist or []), 'limit': limit or 0}
+        try:
+            response = self.session.get(f"{self.base_url}/ads", params=params, timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if self.fallback is None:
+                raise
+            warning("Rate cache at {} is unreachable ({}); fetching directly.", self.base_url, type(e).__name__)
+            return self.fallback.fetch_ads(market, whitelist=whitelist, limit=limit)
+        if response.status_code != 200:
+            raise RuntimeError(f"Rate cache error {response.status_code}: {response.text}")
+        return [Ad(**ad) for ad in response.json()['ads']]
+
+    def close(self):
+        self.session.close()
+        if self.fallback is not None:
+            self.fallback.close()
+
+
+def subscribe(base_url, url, whitelist=None, limit=None, timeout=60):
+    """Yields (fetched_at, [Ad]) for every snapshot the daemon pushes for a page."""
+    params = {'url': url, 'whitelist': ','.join(whitelist or []), 'limit': limit or 0}
+    with requests.get(f"{base_url.rstrip('/')}/subscribe", params=params, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        # Read line by line: iter_lines() would wait for a full chunk before yielding.
+        for raw in iter(response.raw.readline, b''):
+            line = raw.decode('utf-8').rstrip('\r\n')
+            if line.startswith('data: '):
+                data = json.loads(line[len('data: '):])
+                yield data['fetched_at'], [Ad(**ad) for ad in data['ads']]
+
+
+def main(argv=None):
+    from functools import partial
+
+    from .browser import create_chrome_driver
+    from .config import load_config
+    from .driver_pool import DriverPool
+    from .monitor import DEFAULT_CONFIG_PATH, build_fetchers
+
+    parser = argparse.ArgumentParser(description="Run the shared local rate cache.")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help="Path to markets.json")
+    parser.add_argument('--port', type=int, help="Port (default: from rate_cache_url, else 8765)")
+    parser.add_argument('--ttl', type=float, help="Snapshot TTL in seconds (default: rate_cache_ttl)")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    port = args.port or urlparse(config.rate_cache_url or '').port or DEFAULT_PORT
+    pool = DriverPool(partial(create_chrome_driver, config.chromedriver_path, config.browser_profile()),
+                      size=config.driver_pool_size, max_uses=config.driver_max_uses)
+    fetchers = build_fetchers(config, pool)
+    try:
+        run_daemon(RateCache(fetchers, ttl=args.ttl or config.rate_cache_ttl), port)
+    finally:
+        for fetcher in fetchers.values():
+            fetcher.close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Event-driven page readiness for the scrapers.
+
+Instead of sleeping a fixed 10 seconds after `driver.get(url)`, the scrapers load pages
+with the 'eager' strategy and poll a cheap probe (the price element's text, or the
+innerText of the ad table) until it returns the same non-empty value for a short
+stability window. Each source gets its own latency budget; if the page is not ready
+within it a TimeoutException is raised, exactly like a plain WebDriverWait.
+"""
+import time
+
+from .common import debug
+
+# Selenium is imported inside the functions, so code paths that never open a browser
+# (the JSON backend, replays, one-shot checks) do not pay for loading it.
+
+# Page load strategy used by the driver factories: return once the DOM is parsed
+# instead of waiting for every image, font and tracking script.
+PAGE_LOAD_STRATEGY = 'eager'
+
+# How often the probe is polled and how long its value must stay unchanged.
+POLL_INTERVAL = 0.25
+STABLE_FOR = 0.5
+
+
+class value_is_stable:
+    """
+    Expected condition that is met once `probe(driver)` has returned the same non-empty
+    value for at least `stable_for` seconds. Returns that value.
+    """
+
+    def __init__(self, probe, stable_for=STABLE_FOR):
+        self.probe = probe
+        self.stable_for = stable_for
+        self._last = None
+        self._since = None
+
+    def __call__(self, driver):
+        from selenium.common.exceptions import WebDriverException
+        try:
+            value = self.probe(driver)
+        except WebDriverException:
+            value = None
+        now = time.monotonic()
+        if not value:
+            self._last = None
+            return False
+        if value != self._last:
+            self._last = value
+            self._since = now
+            return False
+        if now - self._since >= self.stable_for:
+            return value
+        return False
+
+
+def css_text_probe(selector):
+    """Probe returning the stripped text of the first element matching a CSS selector."""
+    def probe(driver):
+        from selenium.webdriver.common.by import By
+        return driver.find_element(By.CSS_SELECTOR, selector).text.strip()
+    return probe
+
+
+def xpath_text_probe(xpath):
+    """Probe returning the innerText of the first node matching an XPath, in one round trip."""
+    script = (
+        "var node = document.evaluate(arguments[0], document, null, "
+        "XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;"
+        "return node ? node.innerText.trim() : null;"
+    )
+
+    def probe(driver):
+        return driver.execute_script(script, xpath)
+    return probe
+
+
+def wait_until_ready(driver, probe, budget, stable_for=STABLE_FOR, poll=POLL_INTERVAL):
+    """
+    Waits until `probe` reports a stable value and returns it.
+
+    Args:
+        driver: Selenium driver that has already navigated to the page.
+        probe (callable): Function of the driver returning the readiness value.
+        budget (float): Latency budget in seconds for this source.
+
+    Raises:
+        TimeoutException: If the page is not ready within the budget.
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    start = time.monotonic()
+    value = WebDriverWait(driver, budget, poll_frequency=poll).until(value_is_stable(probe, stable_for))
+    debug("Page ready after {:.2f}s", time.monotonic() - start)
+    return value
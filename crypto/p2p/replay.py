@@ -0,0 +1,162 @@
+"""
+Replay stored tick history through the threshold-ladder alert logic.
+
+`replay_ladder` streams (timestamp, spread) ticks through the same LadderState the
+live monitors use, with a simulated clock taken from the tick timestamps, so the
+08:00 reset happens where it would have happened live.
+
+`sweep_ladders` evaluates many candidate ladders in one pass. Within an alert period
+the set of alerted thresholds is always "every threshold at or below the running
+maximum spread", so an alert fires exactly when the running maximum crosses into a
+new threshold bucket. The running maximum is computed once per history with NumPy and
+each ladder then costs one searchsorted. Without NumPy the ladders are replayed with
+`replay_ladder` in a process pool.
+
+Usage:
+    python -m p2p.replay --store ../data/ticks --market "Binance PGK/USDT" \\
+        --ladder 1.6:15000,1.8:5000,2.0:10000 --ladder 1.5:10000,2.0:20000
+"""
+import argparse
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+
+from .alerts import RESET_HOUR, should_reset
+from .ladder import Ladder, LadderState
+from .tickstore import TickStore
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; sweeps fall back to a process pool
+    np = None
+
+
+@dataclass
+class ReplayResult:
+    """Outcome of replaying one ladder: alerts sent and tranche volume newly triggered."""
+    ladder: list
+    alerts: int = 0
+    volume: float = 0.0
+    periods: int = 0
+
+
+def load_spreads(store, market, start, end):
+    """Returns (timestamps, spreads) arrays of the market's spread ticks in [start, end)."""
+    timestamps, spreads = array('d'), array('d')
+    for tick in store.scan(start, end, market=market, side='SELL'):
+        if tick.spread == tick.spread:  # skip NaN
+            timestamps.append(tick.ts)
+            spreads.append(tick.spread)
+    return timestamps, spreads
+
+
+def replay_ladder(timestamps, spreads, thresholds, reset_hour=RESET_HOUR):
+    """Reference replay: feeds every tick through a live LadderState."""
+    result = ReplayResult(list(thresholds))
+    state = LadderState(Ladder(thresholds), reset_hour)
+    for ts, spread in zip(timestamps, spreads):
+        if state.reset_if_due(datetime.fromtimestamp(ts)):
+            result.periods += 1
+        elif result.periods == 0:
+            result.periods = 1
+        hit = state.evaluate(spread)
+        if hit:
+            result.alerts += 1
+            result.volume += hit[3]
+    return result
+
+
+def _period_bounds(timestamps, reset_hour):
+    """
+    Start indices of each alert period in `timestamps` (plus the end index). Periods
+    start at the ticks where LadderState would reset: the first tick at or after the
+    reset hour of a new day, which after a gap in the history may be days later.
+    """
+    bounds = [0]
+    last_reset_date = None
+    for i, ts in enumerate(timestamps):
+        now = datetime.fromtimestamp(ts)
+        if should_reset(now, last_reset_date, reset_hour):
+            last_reset_date = now.date()
+            if i:
+                bounds.append(i)
+    bounds.append(len(timestamps))
+    return bounds
+
+
+def _sweep_vectorized(timestamps, spreads, ladders, reset_hour):
+    if not len(spreads):
+        return [ReplayResult(list(ladder)) for ladder in ladders]
+    spreads = np.frombuffer(spreads, dtype=np.float64) if isinstance(spreads, array) else np.asarray(spreads, dtype=np.float64)
+    bounds = _period_bounds(timestamps, reset_hour)
+    starts, ends = np.array(bounds[:-1]), np.array(bounds[1:])
+    running_max = np.empty_like(spreads)
+    for start, end in zip(starts, ends):
+        np.maximum.accumulate(spreads[start:end], out=running_max[start:end])
+
+    results = []
+    for ladder in ladders:
+        steps = Ladder(ladder)
+        thr = np.frombuffer(steps.thresholds, dtype=np.float64)
+        cum_amounts = np.concatenate(([0.0], np.frombuffer(steps.cumulative, dtype=np.float64)))
+        buckets = np.searchsorted(thr, running_max, side='right')
+        previous = np.empty_like(buckets)
+        previous[1:] = buckets[:-1]
+        previous[starts] = 0
+        alerts = int(np.count_nonzero(buckets > previous))
+        volume = float(cum_amounts[buckets[ends - 1]].sum())
+        results.append(ReplayResult(list(ladder), alerts, volume, len(starts)))
+    return results
+
+
+def sweep_ladders(timestamps, spreads, ladders, reset_hour=RESET_HOUR, workers=None):
+    """Replays every ladder in `ladders` over the same history; returns a ReplayResult per ladder."""
+    if np is not None:
+        return _sweep_vectorized(timestamps, spreads, ladders, reset_hour)
+    replay = partial(replay_ladder, timestamps, spreads, reset_hour=reset_hour)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(replay, ladders))
+
+
+def parse_ladder(text):
+    """Parses '1.6:15000,1.8:5000' into [(1.6, 15000.0), (1.8, 5000.0)]."""
+    ladder = []
+    for step in text.split(','):
+        threshold, amount = step.split(':')
+        ladder.append((float(threshold), float(amount)))
+    return ladder
+
+
+def _parse_date(text):
+    return datetime.strptime(text, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay stored ticks through candidate threshold ladders.")
+    parser.add_argument('--store', default='../data/ticks', help="Tick store directory")
+    parser.add_argument('--market', required=True, help="Market name, e.g. 'Binance PGK/USDT'")
+    parser.add_argument('--start', help="First day to replay (YYYY-MM-DD, UTC)")
+    parser.add_argument('--end', help="Day after the last day to replay (YYYY-MM-DD, UTC)")
+    parser.add_argument('--ladder', action='append', required=True, type=parse_ladder,
+                        help="Ladder as threshold:amount pairs, e.g. 1.6:15000,1.8:5000 (repeatable)")
+    args = parser.parse_args(argv)
+
+    store = TickStore(args.store)
+    start = _parse_date(args.start) if args.start else 0.0
+    end = _parse_date(args.end) if args.end else time.time() + 1
+    timestamps, spreads = load_spreads(store, args.market, start, end)
+    print(f"Loaded {len(spreads)} ticks for {args.market}")
+
+    started = time.monotonic()
+    results = sweep_ladders(timestamps, spreads, args.ladder)
+    print(f"Evaluated {len(results)} ladder(s) in {time.monotonic() - started:.3f}s")
+    for result in results:
+        ladder = ','.join(f"{thr}:{amt:g}" for thr, amt in result.ladder)
+        print(f"{ladder}\talerts={result.alerts}\tvolume={result.volume:g}\tperiods={result.periods}")
+
+
+if __name__ == "__main__":
+    main()
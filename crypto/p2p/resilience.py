@@ -0,0 +1,182 @@
+"""
+Tail-latency control for the rate fetchers.
+
+ResilientFetcher wraps the fetcher of one source with:
+
+- a deadline: a lookup that has not finished after `deadline` seconds fails with a
+  TimeoutError, so one hung page cannot hold the whole cycle,
+- hedging: once an attempt has run longer than the source's recent p90 latency, a
+  second identical attempt is started and whichever finishes first wins,
+- a circuit breaker: after `failures` consecutive failed lookups the source is skipped
+  for `cooldown` seconds, then a single trial lookup decides whether to close it again.
+
+An abandoned attempt cannot be interrupted; it finishes in the background and only
+its result is ignored (a Selenium attempt keeps its pooled driver until then).
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from . import metrics
+from .common import debug, warning
+from .fetchers import RateFetcher
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of fetching while a source's circuit breaker is open."""
+
+
+class LatencyTracker:
+    """Recent successful lookup latencies of one source."""
+
+    def __init__(self, window=100, min_samples=10):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q):
+        """The q-th percentile of the window, or None until enough samples were seen."""
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Args:
+        name (str): Reported in logs and to `on_change`.
+        failures (int): Consecutive failures that open the circuit.
+        cooldown (float): Seconds the circuit stays open before a trial lookup.
+        on_change (callable, optional): Called as on_change(name, state, reason).
+    """
+
+    def __init__(self, name, failures=3, cooldown=300, on_change=None):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self.on_change = on_change
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def _set(self, state, reason):
+        self.state = state
+        warning("{}: circuit {} ({})", self.name, state, reason)
+        metrics.set_gauge('p2p_circuit_open', 0 if state == CLOSED else 1, source=self.name)
+        if self.on_change is not None:
+            self.on_change(self.name, state, reason)
+
+    def allow(self):
+        """True if a lookup may run now; lets a single trial through once the cooldown is over."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self._set(HALF_OPEN, "cool-down over, trying once")
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                self._set(CLOSED, "trial lookup succeeded")
+
+    def record_failure(self, error):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failures):
+                self.opened_at = time.monotonic()
+                self._set(OPEN, f"{self.consecutive_failures} consecutive failures, last: {error}; "
+                                f"skipping for {self.cooldown:g}s")
+
+    def remaining_cooldown(self):
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at)) if self.state == OPEN else 0.0
+
+
+class ResilientFetcher(RateFetcher):
+    """
+    Deadline, hedging and circuit breaking around another fetcher.
+
+    Args:
+        fetcher (RateFetcher): The fetcher doing the actual lookups.
+        source (str): Source name, for the breaker, metrics and logs.
+        deadline (float): Seconds before a lookup fails with a TimeoutError.
+        hedge (bool): Start a second attempt once the first passes the p90 latency.
+        hedge_min_delay (float): Never hedge earlier than this many seconds.
+        failures (int), cooldown (float), on_change (callable): See CircuitBreaker.
+    """
+
+    def __init__(self, fetcher, source, deadline=45, hedge=True, hedge_min_delay=1.0,
+                 failures=3, cooldown=300, on_change=None, max_workers=8):
+        self.fetcher = fetcher
+        self.name = fetcher.name
+        self.source = source
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(source, failures, cooldown, on_change)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'{source}-fetch')
+
+    def hedge_delay(self):
+        """Seconds after which a second attempt is started, or None to not hedge."""
+        if not self.hedge:
+            return None
+        p90 = self.latency.percentile(90)
+        if p90 is None:
+            return None
+        return max(self.hedge_min_delay, p90)
+
+    def _attempt(self, market, whitelist, limit):
+        start = time.monotonic()
+        ads = self.fetcher.fetch_ads(market, whitelist=whitelist, limit=limit)
+        self.latency.add(time.monotonic() - start)
+        return ads
+
+    def fetch_ads(self, market, whitelist=None, limit=None):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.source} circuit open for another {self.breaker.remaining_cooldown():.0f}s")
+        start = time.monotonic()
+        futures = [self._executor.submit(self._attempt, market, whitelist, limit)]
+        delay = self.hedge_delay()
+        if delay is not None and delay < self.deadline:
+            done, _ = wait(futures, timeout=delay)
+            if not done:
+                debug("{}: lookup slower than p90 ({:.1f}s); hedging with a second attempt", self.source, delay)
+                metrics.inc('p2p_hedged_total', source=self.source)
+                futures.append(self._executor.submit(self._attempt, market, whitelist, limit))
+
+        error = None
+        pending = set(futures)
+        while pending:
+            remaining = self.deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self.breaker.record_success()
+                    return future.result()
+                error = future.exception()
+        if pending:
+            metrics.inc('p2p_deadline_exceeded_total', source=self.source)
+            error = TimeoutError(f"{self.source} lookup exceeded its {self.deadline:g}s deadline")
+        self.breaker.record_failure(error)
+        raise error
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.fetcher.close()
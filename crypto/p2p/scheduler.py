@@ -0,0 +1,85 @@
+"""
+Adaptive polling intervals driven by the distance to the next alert threshold.
+
+For every market the scheduler keeps an exponentially weighted estimate of the
+variance rate of its observed value (the spread for spread markets, the price for
+price markets): var_rate ~ E[(dx)^2 / dt]. Treating the value as a random walk, the expected
+time to move a distance d is d^2 / var_rate, so the next poll is scheduled after a
+fraction (`safety`) of that time, clamped to the source's [min_interval, max_interval].
+
+Markets close to a trigger or moving fast are polled quickly; quiet markets far from
+their next threshold back off to the maximum interval.
+"""
+import math
+import time
+
+from .common import debug
+
+# Fraction of the expected time-to-threshold to wait before the next poll.
+SAFETY = 0.25
+# Weight of the newest observation in the variance-rate estimate.
+EWMA_ALPHA = 0.2
+
+
+class MarketTrack:
+    """Recent history needed to estimate how fast one market moves."""
+
+    def __init__(self):
+        self.last_value = None
+        self.last_time = None
+        self.var_rate = None
+
+    def observe(self, value, now, alpha):
+        if self.last_value is not None and now > self.last_time:
+            sample = (value - self.last_value) ** 2 / (now - self.last_time)
+            self.var_rate = sample if self.var_rate is None else alpha * sample + (1 - alpha) * self.var_rate
+        self.last_value = value
+        self.last_time = now
+
+
+class AdaptiveScheduler:
+    """
+    Chooses each market's next poll interval.
+
+    Args:
+        bounds (dict): Maps a source to its (min_interval, max_interval) in seconds.
+        safety (float): Fraction of the expected time-to-threshold to wait.
+        alpha (float): EWMA weight for the variance-rate estimate.
+    """
+
+    def __init__(self, bounds, safety=SAFETY, alpha=EWMA_ALPHA):
+        self.bounds = bounds
+        self.safety = safety
+        self.alpha = alpha
+        self.tracks = {}
+
+    def interval(self, name, source, value, target, default, now=None):
+        """
+        Returns the seconds until the next poll of market `name`.
+
+        Args:
+            value (float): The value just observed, or None if the check failed.
+            target (float): The value that would trigger the next alert, or None if
+                nothing is left to alert on.
+            default (float): Interval used until the market's volatility is known.
+        """
+        now = time.time() if now is None else now
+        min_interval, max_interval = self.bounds.get(source, (default, default))
+        if value is None:
+            return default
+        track = self.tracks.setdefault(name, MarketTrack())
+        track.observe(value, now, self.alpha)
+        if target is None:
+            return max_interval
+        distance = target - value
+        if distance <= 0:
+            return min_interval
+        if track.var_rate is None:
+            return min(max(default, min_interval), max_interval)
+        if track.var_rate <= 0:
+            return max_interval
+        expected = distance * distance / track.var_rate
+        seconds = min(max(self.safety * expected, min_interval), max_interval)
+        debug("{}: {:.3f} from next trigger, volatility {:.4f}/sqrt(s), next poll in {:.0f}s",
+              name, distance, math.sqrt(track.var_rate), seconds)
+        return seconds
@@ -0,0 +1,210 @@
+"""
+Crash-safe persistence of the per-market ladder alert state.
+
+Every change (a new threshold alerted, or a daily reset) is appended as one JSON line
+to a write-ahead journal (`<path>.journal`) and fsync'd by a background thread, so
+state writes never block the monitor loop. Every `compact_every` entries the current
+state is written to a snapshot file (`<path>`) via a temporary file, fsync and atomic
+rename, and the journal is truncated.
+
+On startup the snapshot is loaded and the journal replayed on top of it. A torn last
+line from a crash is cut off the journal before anything is appended after it, so it
+cannot swallow the next entry. Replaying the same journal twice gives the same state,
+so restarts are idempotent and do not re-fire alerts already sent that day.
+
+Several monitor processes may share one state file (each with its own markets). Every
+read, append and compaction holds an exclusive lock on `<path>.lock`, and compaction
+rebuilds the snapshot from the files on disk rather than from this process's own
+changes, so no process drops the others' entries.
+
+A state is stored as the highest alerted threshold rather than a count, so it still
+restores sensibly if the ladder's steps are edited between runs.
+"""
+import json
+import os
+import threading
+from datetime import date
+from queue import Queue, Empty
+
+from .common import error, file_lock, log, warning
+
+_STOP = object()
+
+
+def _key(market, ladder):
+    return f"{market}\x1f{ladder}"
+
+
+def _truncate_torn_tail(file):
+    """Cuts a partial last line (a write torn by a crash) off a binary file; returns the bytes dropped."""
+    size = file.seek(0, os.SEEK_END)
+    keep = size
+    while keep > 0:
+        start = max(0, keep - 4096)
+        file.seek(start)
+        newline = file.read(keep - start).rfind(b'\n')
+        if newline >= 0:
+            keep = start + newline + 1
+            break
+        keep = start
+    if keep < size:
+        file.truncate(keep)
+    file.seek(0, os.SEEK_END)
+    return size - keep
+
+
+def _fsync_directory(path):
+    """Makes a rename in `path` durable; a no-op where directories cannot be opened (Windows)."""
+    try:
+        directory = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(directory)
+    except OSError:
+        pass  # not supported on every platform
+    finally:
+        os.close(directory)
+
+
+class StateJournal:
+    """
+    Journal + snapshot store for LadderEngine states.
+
+    Args:
+        path (str): Snapshot file path; the journal lives next to it.
+        compact_every (int): Journal entries written before a new snapshot is taken.
+    """
+
+    def __init__(self, path, compact_every=500):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.lock_path = path + '.lock'
+        self.compact_every = compact_every
+        self._journal_entries = 0
+        self._queue = Queue()
+        self._thread = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    # ----------------------------- Loading -----------------------------
+
+    def _read_states(self):
+        """Snapshot + journal from disk as {key: record}; call with the file lock held."""
+        states = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as file:
+                    for record in json.load(file).get('states', []):
+                        states[_key(record['market'], record['ladder'])] = record
+            except (OSError, ValueError) as e:
+                warning("Could not read alert state snapshot {}: {}", self.path, e)
+        entries = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r+b') as file:
+                dropped = _truncate_torn_tail(file)
+                if dropped:
+                    warning("Dropped a torn {}-byte entry from the end of {}", dropped, self.journal_path)
+                file.seek(0)
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    states[_key(record['market'], record['ladder'])] = record
+                    entries += 1
+        self._journal_entries = entries
+        return states
+
+    def load(self):
+        """Returns {(market, ladder): (highest_alerted, last_reset_date)} from disk."""
+        with file_lock(self.lock_path):
+            states = self._read_states()
+        return {
+            (r['market'], r['ladder']): (r.get('alerted_up_to'),
+                                         date.fromisoformat(r['reset_date']) if r.get('reset_date') else None)
+            for r in states.values()
+        }
+
+    def restore(self, engine):
+        """Loads the persisted state into a LadderEngine's already-registered markets."""
+        restored = 0
+        for (market, ladder), (alerted_up_to, reset_date) in self.load().items():
+            state = engine.markets.get(market, {}).get(ladder)
+            if state is not None:
+                state.restore(alerted_up_to, reset_date)
+                restored += 1
+        if restored:
+            log("Restored alert state for {} market ladder(s) from {}", restored, self.path)
+        return restored
+
+    # ----------------------------- Writing -----------------------------
+
+    def record(self, market, ladder, state):
+        """Queues a state change; suitable as LadderEngine(on_change=...)."""
+        entry = {
+            'market': market,
+            'ladder': ladder,
+            'alerted_up_to': state.highest_alerted,
+            'reset_date': state.last_reset_date.isoformat() if state.last_reset_date else None,
+        }
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='state-journal', daemon=True)
+            self._thread.start()
+        self._queue.put(entry)
+
+    def _run(self):
+        with open(self.journal_path, 'a+b') as journal:
+            while True:
+                batch = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except Empty:
+                        break
+                stop = _STOP in batch
+                entries = [entry for entry in batch if entry is not _STOP]
+                if entries:
+                    try:
+                        with file_lock(self.lock_path):
+                            self._append(journal, entries)
+                    except OSError as e:
+                        error("Failed to persist alert state: {}", e)
+                for _ in batch:
+                    self._queue.task_done()
+                if stop:
+                    return
+
+    def _append(self, journal, entries):
+        # Another process may have crashed mid-write since this one last appended.
+        _truncate_torn_tail(journal)
+        journal.write(b''.join(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n'
+                               for entry in entries))
+        journal.flush()
+        os.fsync(journal.fileno())
+        self._journal_entries += len(entries)
+        if self._journal_entries >= self.compact_every:
+            self._compact(journal)
+
+    def _compact(self, journal):
+        """Writes a snapshot of everything on disk atomically, then truncates the journal."""
+        states = self._read_states()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'states': list(states.values())}, file, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+        _fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+        journal.truncate(0)
+        self._journal_entries = 0
+
+    def flush(self):
+        """Blocks until every queued change is on disk."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,218 @@
+"""
+Append-only, memory-mapped store of timestamped rate/spread ticks.
+
+Ticks are fixed-width binary records appended to one segment file per UTC day
+(`<root>/YYYY-MM-DD.ticks`). Market names are interned into small integer ids kept in
+`<root>/markets.json`, so a record is 32 bytes:
+
+    timestamp (float64) | price (float64) | spread (float64) | market id (uint16) | side (uint8) | padding
+
+Records in a segment are in non-decreasing timestamp order, so range scans and rolling
+windows mmap only the segments they touch, bisect to the first record and stream
+from there without loading the whole history into memory.
+
+Several monitor processes can share one store. Each append holds an exclusive lock on
+`<root>/.lock`, re-reads `markets.json` before interning a new market name, and clamps
+its timestamp to the segment's last record, so ids stay unique and segments sorted
+across writers. A partial record left by a crash is cut off before the next append.
+"""
+import json
+import math
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from .common import file_lock
+
+RECORD = struct.Struct('<dddHB5x')
+SEGMENT_SUFFIX = '.ticks'
+
+SIDES = ['SPREAD', 'BUY', 'SELL']
+SIDE_CODES = {side: code for code, side in enumerate(SIDES)}
+
+Tick = namedtuple('Tick', ['ts', 'market', 'side', 'price', 'spread'])
+
+
+def _day(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).date()
+
+
+class TickStore:
+    """
+    Tick history rooted at directory `root`.
+
+    Args:
+        root (str): Directory holding the daily segment files (created on first append).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._markets_path = os.path.join(root, 'markets.json')
+        self._lock_path = os.path.join(root, '.lock')
+        self._market_ids = {}
+        self._market_names = {}
+        self._load_markets()
+        self._segment = None
+        self._segment_day = None
+        self._last_ts = 0.0
+
+    def _load_markets(self):
+        """Re-reads the market ids, which other processes sharing the store may have added to."""
+        if os.path.exists(self._markets_path):
+            with open(self._markets_path, 'r') as file:
+                self._market_ids = json.load(file)
+            self._market_names = {i: name for name, i in self._market_ids.items()}
+
+    # ----------------------------- Writing -----------------------------
+
+    def _market_id(self, market):
+        """Id of `market`, assigned on first use; call with the store lock held."""
+        market_id = self._market_ids.get(market)
+        if market_id is None:
+            self._load_markets()
+            market_id = self._market_ids.get(market)
+        if market_id is None:
+            market_id = len(self._market_ids)
+            self._market_ids[market] = market_id
+            self._market_names[market_id] = market
+            os.makedirs(self.root, exist_ok=True)
+            tmp_path = self._markets_path + '.tmp'
+            with open(tmp_path, 'w') as file:
+                json.dump(self._market_ids, file)
+            os.replace(tmp_path, self._markets_path)
+        return market_id
+
+    def _segment_path(self, day):
+        return os.path.join(self.root, day.isoformat() + SEGMENT_SUFFIX)
+
+    def _segment_for(self, ts):
+        day = _day(ts)
+        if day != self._segment_day:
+            if self._segment is not None:
+                self._segment.close()
+            path = self._segment_path(day)
+            os.makedirs(self.root, exist_ok=True)
+            self._segment = open(path, 'a+b')
+            self._segment_day = day
+        return self._segment
+
+    @staticmethod
+    def _segment_last_ts(segment):
+        """Timestamp of the segment's last record (0.0 if empty), after cutting off a torn one."""
+        size = segment.seek(0, os.SEEK_END)
+        torn = size % RECORD.size
+        if torn:
+            size -= torn
+            segment.truncate(size)
+        if not size:
+            return 0.0
+        segment.seek(size - RECORD.size)
+        return RECORD.unpack(segment.read(RECORD.size))[0]
+
+    def append(self, market, side, price=math.nan, spread=math.nan, ts=None):
+        """
+        Appends one tick. `side` is 'BUY', 'SELL' or 'SPREAD'. Timestamps that go
+        backwards (e.g. a wall-clock step, or another process's later tick) are
+        clamped to keep each segment sorted.
+        """
+        ts = time.time() if ts is None else ts
+        ts = max(ts, self._last_ts)
+        os.makedirs(self.root, exist_ok=True)
+        with file_lock(self._lock_path):
+            market_id = self._market_id(market)
+            segment = self._segment_for(ts)
+            ts = max(ts, self._segment_last_ts(segment))
+            segment.write(RECORD.pack(ts, price, spread, market_id, SIDE_CODES[side]))
+            segment.flush()
+        self._last_ts = ts
+
+    def close(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+            self._segment_day = None
+
+    # ----------------------------- Reading -----------------------------
+
+    def segments(self):
+        """Sorted list of the days that have a segment file."""
+        days = []
+        if not os.path.isdir(self.root):
+            return days
+        for name in os.listdir(self.root):
+            if name.endswith(SEGMENT_SUFFIX):
+                days.append(datetime.strptime(name[:-len(SEGMENT_SUFFIX)], '%Y-%m-%d').date())
+        return sorted(days)
+
+    @staticmethod
+    def _bisect(buf, count, ts):
+        """Index of the first record in `buf` with timestamp >= ts."""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if struct.unpack_from('<d', buf, mid * RECORD.size)[0] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _market_name(self, market_id):
+        name = self._market_names.get(market_id)
+        if name is None:
+            self._load_markets()
+            name = self._market_names.get(market_id, str(market_id))
+        return name
+
+    def _scan_segment(self, path, start, end, market_id, side_code):
+        size = os.path.getsize(path)
+        count = size // RECORD.size
+        if count == 0:
+            return
+        with open(path, 'rb') as file, mmap.mmap(file.fileno(), count * RECORD.size, access=mmap.ACCESS_READ) as buf:
+            first = self._bisect(buf, count, start)
+            for offset in range(first * RECORD.size, count * RECORD.size, RECORD.size):
+                ts, price, spread, m_id, s_code = RECORD.unpack_from(buf, offset)
+                if ts >= end:
+                    break
+                if market_id is not None and m_id != market_id:
+                    continue
+                if side_code is not None and s_code != side_code:
+                    continue
+                yield Tick(ts, self._market_name(m_id), SIDES[s_code], price, spread)
+
+    def scan(self, start, end, market=None, side=None):
+        """
+        Yields ticks with start <= ts < end (epoch seconds), oldest first,
+        optionally restricted to one market and/or side.
+        """
+        if self._segment is not None:
+            self._segment.flush()
+        if market is not None and market not in self._market_ids:
+            self._load_markets()
+            if market not in self._market_ids:
+                return
+        market_id = self._market_ids.get(market) if market is not None else None
+        side_code = SIDE_CODES[side] if side is not None else None
+        day, last_day = _day(start), _day(end)
+        while day <= last_day:
+            path = self._segment_path(day)
+            if os.path.exists(path):
+                yield from self._scan_segment(path, start, end, market_id, side_code)
+            day += timedelta(days=1)
+
+    def window(self, seconds, market=None, side=None, now=None):
+        """Ticks from the last `seconds` seconds (a rolling window ending at `now`)."""
+        now = time.time() if now is None else now
+        return self.scan(now - seconds, now + 1e-6, market=market, side=side)
+
+    def __iter__(self):
+        """Every stored tick, oldest first."""
+        days = self.segments()
+        if not days:
+            return iter(())
+        start = datetime.combine(days[0], datetime.min.time(), tzinfo=timezone.utc).timestamp()
+        end = datetime.combine(days[-1] + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc).timestamp()
+        return self.scan(start, end)
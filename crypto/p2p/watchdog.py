@@ -0,0 +1,285 @@
+"""
+Chrome process lifecycle watchdog.
+
+Every Chrome started by create_chrome_driver carries the WATCHDOG_MARKER switch with
+the pid of the process that launched it (`--p2p-watchdog=<pid>`; Chrome ignores
+unknown switches), so its processes can be recognised, and their owner told apart,
+even after that process has died. ChromeWatchdog then, from a background thread every
+`interval` seconds:
+
+- samples the RSS of each pooled driver's process tree (chromedriver and every Chrome
+  process under it) and retires drivers over `max_rss` so the pool recycles them,
+- reaps orphans: our chromedrivers (one of the pool's drivers, or one with marked
+  Chrome processes under it) and marked Chrome processes whose owner has exited, left
+  behind by crashes or by a webdriver.Chrome(...) call that raised half way,
+- reports process counts, memory and reaped/recycled totals to the log and metrics.
+
+Orphans are also reaped once at startup. Ownership is never inferred from a process's
+parent: a chromedriver without marked Chrome processes (e.g. a system service) is not
+ours, and ours is still recognised when a subreaper (systemd, tini) adopted it. Drivers
+owned by another live monitor process are never touched.
+
+Process information comes from psutil when it is installed, and from /proc on Linux
+otherwise; without either the watchdog only relies on the pool's own recycling.
+"""
+import os
+import re
+import signal
+import threading
+from dataclasses import dataclass
+
+from . import metrics
+from .common import log, warning
+
+try:
+    import psutil
+except ImportError:  # optional; falls back to /proc on Linux
+    psutil = None
+
+WATCHDOG_MARKER = '--p2p-watchdog'
+CHROMEDRIVER_NAMES = ('chromedriver', 'chromedriver.exe')
+_MARKER_RE = re.compile(re.escape(WATCHDOG_MARKER) + r'(?:=(\d+))?(?!\S)')
+
+
+def watchdog_switch(owner=None):
+    """The Chrome switch marking a process as launched by `owner` (default: this process)."""
+    return f'{WATCHDOG_MARKER}={os.getpid() if owner is None else owner}'
+
+
+def marker_owner(cmdline):
+    """Pid from a marked command line, 0 if the marker has none, or None if unmarked."""
+    match = _MARKER_RE.search(cmdline)
+    if match is None:
+        return None
+    return int(match.group(1) or 0)
+
+
+@dataclass
+class ProcessInfo:
+    pid: int
+    ppid: int
+    name: str
+    cmdline: str
+    rss: int
+
+
+def _proc_info(pid):
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as file:
+            stat = file.read().decode('utf-8', 'replace')
+        name = stat[stat.index('(') + 1:stat.rindex(')')]
+        ppid = int(stat[stat.rindex(')') + 2:].split()[1])
+        with open(f'/proc/{pid}/cmdline', 'rb') as file:
+            cmdline = file.read().replace(b'\0', b' ').decode('utf-8', 'replace')
+        with open(f'/proc/{pid}/statm') as file:
+            rss = int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+    return ProcessInfo(pid, ppid, name, cmdline, rss)
+
+
+def process_table():
+    """Returns {pid: ProcessInfo} for every visible process, or None if unsupported here."""
+    if psutil is not None:
+        table = {}
+        for process in psutil.process_iter(['pid', 'ppid', 'name', 'cmdline', 'memory_info']):
+            info = process.info
+            table[info['pid']] = ProcessInfo(
+                info['pid'], info['ppid'] or 0, info['name'] or '', ' '.join(info['cmdline'] or []),
+                info['memory_info'].rss if info['memory_info'] else 0,
+            )
+        return table
+    if not os.path.isdir('/proc'):
+        return None
+    table = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            info = _proc_info(int(entry))
+            if info is not None:
+                table[info.pid] = info
+    return table
+
+
+def _children_map(table):
+    children = {}
+    for info in table.values():
+        children.setdefault(info.ppid, []).append(info.pid)
+    return children
+
+
+def process_tree(pid, table=None, children=None):
+    """Pids of `pid` and all its descendants that are still alive."""
+    table = process_table() if table is None else table
+    if not table or pid not in table:
+        return []
+    children = _children_map(table) if children is None else children
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, ()))
+    return tree
+
+
+def tree_rss(pid, table=None):
+    """Total resident memory in bytes of a process tree (0 if unknown)."""
+    table = process_table() if table is None else table
+    if not table:
+        return 0
+    return sum(table[p].rss for p in process_tree(pid, table) if p in table)
+
+
+def kill_pids(pids):
+    """Kills the given processes, ignoring the ones already gone; returns how many were signalled."""
+    killed = 0
+    for pid in pids:
+        try:
+            if psutil is not None:
+                psutil.Process(pid).kill()
+            else:
+                os.kill(pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+            killed += 1
+        except Exception:
+            pass
+    return killed
+
+
+def _is_chromedriver(info):
+    return info.name.lower() in CHROMEDRIVER_NAMES
+
+
+def find_orphans(table, live_pids=(), self_pid=None):
+    """
+    Pids of our Chrome/chromedriver processes that no live owner is left for.
+
+    A chromedriver is ours if it is one of `live_pids` (this pool's drivers, whose
+    trees are always kept) or has marked Chrome processes under it; it is an orphan
+    once the owner named by their marker has exited. A marked Chrome process follows
+    its chromedriver ancestor, or is an orphan without one if its owner has exited or
+    is this process (`self_pid`, default os.getpid()), whose drivers all keep theirs.
+    Chromedrivers and Chrome processes started by this process are otherwise left to
+    the pool, which may still be creating them.
+    """
+    self_pid = os.getpid() if self_pid is None else self_pid
+    children = _children_map(table)
+    keep = set()
+    for pid in live_pids:
+        keep.update(process_tree(pid, table, children))
+
+    def owner_gone(owner):
+        return owner != self_pid and owner not in table
+
+    verdicts = {}  # chromedriver pid -> orphaned?
+
+    def driver_orphaned(info):
+        if info.pid not in verdicts:
+            owners = [marker_owner(table[p].cmdline) for p in process_tree(info.pid, table, children)[1:]]
+            owners = [owner for owner in owners if owner is not None]
+            verdicts[info.pid] = info.pid not in keep and bool(owners) and owner_gone(owners[0])
+        return verdicts[info.pid]
+
+    orphans = []
+    for info in table.values():
+        if info.pid in keep:
+            continue
+        if _is_chromedriver(info):
+            if driver_orphaned(info):
+                orphans.append(info.pid)
+            continue
+        owner = marker_owner(info.cmdline)
+        if owner is None:
+            continue
+        ancestor, seen = table.get(info.ppid), set()
+        while ancestor is not None and ancestor.pid not in seen and not _is_chromedriver(ancestor):
+            seen.add(ancestor.pid)
+            ancestor = table.get(ancestor.ppid)
+        if ancestor is not None and _is_chromedriver(ancestor):
+            if driver_orphaned(ancestor):
+                orphans.append(info.pid)
+        elif owner == self_pid or owner_gone(owner):
+            orphans.append(info.pid)
+    return orphans
+
+
+class ChromeWatchdog:
+    """
+    Periodic memory check and orphan reaping for a DriverPool.
+
+    Args:
+        pool (DriverPool): The pool whose drivers are watched and recycled.
+        max_rss (int): Bytes a driver's process tree may use before it is recycled.
+        interval (float): Seconds between checks.
+        reap_orphans (bool): Kill orphaned Chrome/chromedriver processes.
+    """
+
+    def __init__(self, pool, max_rss=1536 * 2**20, interval=60, reap_orphans=True):
+        self.pool = pool
+        self.max_rss = max_rss
+        self.interval = interval
+        self.reap_orphans = reap_orphans
+        self.reaped = 0
+        self.recycled = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """Runs one check; returns a summary dict, or None if process info is unavailable."""
+        table = process_table()
+        if table is None:
+            return None
+        children = _children_map(table)
+        entries = self.pool.entries()
+        processes = total_rss = 0
+        live_pids = []
+        for entry in entries:
+            pid = self.pool.driver_pid(entry)
+            if pid is None:
+                continue
+            live_pids.append(pid)
+            tree = process_tree(pid, table, children)
+            rss = sum(table[p].rss for p in tree)
+            processes += len(tree)
+            total_rss += rss
+            if rss > self.max_rss and self.pool.retire(entry, f"{rss / 2**20:.0f} MiB over the memory budget"):
+                self.recycled += 1
+                metrics.inc('p2p_drivers_recycled_total', reason='memory')
+
+        reaped = 0
+        if self.reap_orphans:
+            orphans = find_orphans(table, live_pids)
+            if orphans:
+                reaped = kill_pids(orphans)
+                self.reaped += reaped
+                metrics.inc('p2p_orphans_reaped_total', amount=reaped)
+                log("Watchdog: reaped {} orphaned Chrome process(es)", reaped)
+
+        metrics.set_gauge('p2p_chrome_processes', processes)
+        metrics.set_gauge('p2p_chrome_total_rss_bytes', total_rss)
+        summary = {'drivers': len(live_pids), 'processes': processes, 'rss_bytes': total_rss,
+                   'reaped': reaped, 'reaped_total': self.reaped, 'recycled_total': self.recycled}
+        log("Watchdog: {} driver(s), {} Chrome process(es), {:.0f} MiB; reaped {}, recycled {} so far",
+            len(live_pids), processes, total_rss / 2**20, self.reaped, self.recycled)
+        return summary
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                warning("Watchdog check failed: {}", e)
+
+    def start(self):
+        """Reaps leftovers from earlier runs, then checks every `interval` seconds in the background."""
+        if process_table() is None:
+            log("Watchdog: no process information available (install psutil); relying on pool recycling only.")
+            return self
+        self.check()
+        self._thread = threading.Thread(target=self._run, name='chrome-watchdog', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
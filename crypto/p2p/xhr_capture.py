@@ -0,0 +1,73 @@
+"""
+Reading the exchanges' own ad-list XHR responses out of Chrome's performance log.
+
+With performance logging on (BrowserProfile.capture_network), ChromeDriver records the
+DevTools Network events of every request the page makes. wait_for_json() watches those
+events for a request whose URL contains one of the given endpoint paths, and once its
+response has finished loading reads the body with Network.getResponseBody. That gives
+the same structured JSON the JSON backend parses, as soon as the XHR completes and
+independently of how (or whether) the page renders it.
+"""
+import base64
+import json
+import time
+
+from .common import debug, warning
+
+POLL_INTERVAL = 0.1
+
+
+def drain(driver):
+    """Discards performance log entries left over from earlier navigations."""
+    try:
+        driver.get_log('performance')
+    except Exception as e:
+        warning("Performance log unavailable: {}", e)
+
+
+def _response_json(driver, request_id):
+    body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+    text = body.get('body', '')
+    if body.get('base64Encoded'):
+        text = base64.b64decode(text).decode('utf-8')
+    return json.loads(text)
+
+
+def wait_for_json(driver, url_fragments, budget, match=None, poll=POLL_INTERVAL):
+    """
+    Returns the decoded JSON body of the first matching request, or None within `budget` seconds.
+
+    Args:
+        driver: Chrome driver created with performance logging, before or just after navigating.
+        url_fragments (iterable): Substrings identifying the request URL.
+        budget (float): Seconds to wait for the response.
+        match (callable, optional): match(post_data, payload) -> bool, to skip unrelated
+            requests to the same endpoint. post_data is the request body text, or None.
+    """
+    requests = {}  # requestId -> post data of the watched requests
+    deadline = time.monotonic() + budget
+    while time.monotonic() < deadline:
+        for entry in driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+            request_id = params.get('requestId')
+            if method == 'Network.requestWillBeSent':
+                url = params.get('request', {}).get('url', '')
+                if any(fragment in url for fragment in url_fragments):
+                    requests[request_id] = params['request'].get('postData')
+            elif method == 'Network.loadingFinished' and request_id in requests:
+                try:
+                    payload = _response_json(driver, request_id)
+                except Exception as e:
+                    debug("Could not read captured response: {}", e)
+                    continue
+                if match is None or match(requests[request_id], payload):
+                    return payload
+            elif method == 'Network.loadingFailed' and request_id in requests:
+                del requests[request_id]
+        time.sleep(poll)
+    return None
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The p2p package lives next to this directory (setup.py maps it from crypto/).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
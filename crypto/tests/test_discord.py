@@ -0,0 +1,81 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from p2p.discord import DISCORD_MESSAGE_LIMIT, DiscordNotifier, split_message
+
+
+class StubWebhook:
+    """Local webhook answering with the queued status codes (204 once they run out)."""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.requests = []  # (status, content)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                status = stub.statuses.pop(0) if stub.statuses else 204
+                stub.requests.append((status, body['content']))
+                self.send_response(status)
+                if status == 429:
+                    self.send_header('Retry-After', '0.05')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/webhook'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def delivered(self):
+        return [content for status, content in self.requests if status == 204]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def webhook():
+    stub = StubWebhook()
+    yield stub
+    stub.close()
+
+
+def test_rate_limited_post_is_retried_and_messages_coalesced(webhook):
+    webhook.statuses = [429]
+    notifier = DiscordNotifier(webhook.url, coalesce_window=5, backoff=0.01)
+    for message in ('first', 'second', 'third'):
+        assert notifier.send(message)
+    assert notifier.flush(timeout=5)  # sends without waiting out the coalescing window
+    assert [status for status, _ in webhook.requests] == [429, 204]
+    assert webhook.delivered() == ['first\n\nsecond\n\nthird']
+    notifier.close()
+
+
+def test_close_flushes_and_then_drops(webhook):
+    notifier = DiscordNotifier(webhook.url, coalesce_window=5, backoff=0.01)
+    notifier.send('pending')
+    assert notifier.close(timeout=5)
+    assert webhook.delivered() == ['pending']
+    assert not notifier.send('too late')
+
+
+def test_long_messages_are_split(webhook):
+    notifier = DiscordNotifier(webhook.url, coalesce_window=0, backoff=0.01)
+    lines = [f'line {i:04d} ' + 'x' * 90 for i in range(50)]
+    notifier.send('\n'.join(lines))
+    assert notifier.close(timeout=5)
+    delivered = webhook.delivered()
+    assert len(delivered) > 1 and all(len(chunk) <= DISCORD_MESSAGE_LIMIT for chunk in delivered)
+    assert '\n'.join(delivered).split('\n') == lines
+
+
+def test_split_message_without_line_breaks():
+    assert split_message('a' * 4500) == ['a' * 2000, 'a' * 2000, 'a' * 500]
@@ -0,0 +1,121 @@
+import json
+import re
+
+import pytest
+import requests
+
+from p2p import xhr_capture
+from p2p.ads import Ad
+from p2p.bench import WHITELIST, FixtureServer, binance_json, bybit_json, synthetic_ads
+from p2p.driver_pool import PooledDriver
+from p2p.fetchers import (BINANCE, BYBIT, JsonFetcher, Market, SeleniumFetcher, XhrFetcher, parse_binance_ads,
+                          _request_matches, parse_bybit_ads)
+
+ADS = synthetic_ads()
+LISTED = [row for row in ADS if not row[6]]
+
+
+@pytest.fixture(scope='module')
+def fixtures():
+    with FixtureServer(ADS) as server:
+        yield server
+
+
+@pytest.fixture
+def fetcher(fixtures):
+    fetcher = JsonFetcher(binance_api_url=fixtures.base_url + FixtureServer.BINANCE_API,
+                          bybit_api_url=fixtures.base_url + FixtureServer.BYBIT_API, timeout=5)
+    yield fetcher
+    fetcher.close()
+
+
+@pytest.mark.parametrize('parse, payload', [(parse_binance_ads, binance_json), (parse_bybit_ads, bybit_json)])
+def test_parsers(parse, payload):
+    ads = parse(payload(ADS))
+    assert [(ad.advertiser, ad.price, ad.available, ad.min_limit, ad.max_limit) for ad in ads] == \
+        [(name, price, available, low, high) for name, price, available, low, high, _, _ in LISTED]
+    assert ads[0].payment_methods == LISTED[0][5]
+    assert 0 < ads[0].completion_rate <= 1 and ads[0].order_count > 0
+
+
+def test_bybit_error_response():
+    with pytest.raises(RuntimeError):
+        parse_bybit_ads({'ret_code': 10001, 'ret_msg': 'params error'})
+
+
+@pytest.mark.parametrize('source', [BINANCE, BYBIT])
+def test_json_fetcher_against_the_fixture_server(fixtures, fetcher, source):
+    ads = fetcher.fetch_ads(fixtures.market(source), limit=3)
+    assert [ad.price for ad in ads] == [row[1] for row in LISTED[:3]]
+
+
+def test_json_fetcher_whitelist(fixtures, fetcher):
+    ads = fetcher.fetch_ads(fixtures.market(BYBIT), whitelist=[name.upper() for name in WHITELIST])
+    assert [ad.price for ad in ads] == [row[1] for row in LISTED if row[0] in WHITELIST]
+
+
+def test_json_fetcher_http_error(fixtures):
+    fetcher = JsonFetcher(binance_api_url=fixtures.base_url + '/missing', timeout=5)
+    try:
+        with pytest.raises(requests.HTTPError):
+            fetcher.fetch_ads(fixtures.market(BINANCE))
+    finally:
+        fetcher.close()
+
+
+class FakeDriver:
+    def __init__(self):
+        self.timeouts = []
+
+    def set_page_load_timeout(self, seconds):
+        self.timeouts.append(('page_load', seconds))
+
+    def set_script_timeout(self, seconds):
+        self.timeouts.append(('script', seconds))
+
+    def get(self, url):
+        pass
+
+
+class SinglePool:
+    def __init__(self, entry):
+        self.entry = entry
+
+    def checkout(self):
+        return self.entry
+
+    def checkin(self, entry):
+        pass
+
+
+def test_selenium_fetcher_bounds_page_loads_by_the_source_timeout():
+    entry = PooledDriver(FakeDriver())
+    fetcher = SeleniumFetcher(SinglePool(entry), page_load_timeouts={BINANCE: 30, BYBIT: 45})
+    fetcher._extract = lambda driver, market, whitelist, limit: []
+    binance = Market(BINANCE, 'SELL', 'USDT', 'PGK', 'http://127.0.0.1/binance')
+    bybit = Market(BYBIT, 'BUY', 'USDT', 'MYR', 'http://127.0.0.1/bybit')
+    for market in (binance, binance, bybit):
+        fetcher.fetch_ads(market)
+    assert entry.driver.timeouts == [('page_load', 30), ('script', 30), ('page_load', 45), ('script', 45)]
+
+
+@pytest.mark.parametrize('source', [BINANCE, BYBIT])
+def test_fixture_pages_request_their_own_ad_list(fixtures, source):
+    page = requests.get(fixtures.market(source).url, timeout=5).text
+    path, body = re.search(r"fetch\('([^']+)'.*body: '([^']+)'", page).groups()
+    assert path == XhrFetcher.ENDPOINTS[source]
+    assert _request_matches(fixtures.market(source), body, None)
+    assert json.loads(body)
+
+
+@pytest.mark.parametrize('source', [BINANCE, BYBIT])
+def test_xhr_fetcher_falls_back_to_the_dom_on_unparseable_responses(monkeypatch, source):
+    dom_ads = [Ad(price=4.2, advertiser='FromTheDom')]
+    monkeypatch.setattr(SeleniumFetcher, '_extract', lambda self, driver, market, whitelist, limit: dom_ads)
+    with FixtureServer(ADS, api_errors=True) as server:
+        api = server.base_url + XhrFetcher.ENDPOINTS[source]
+        monkeypatch.setattr(xhr_capture, 'wait_for_json',
+                            lambda driver, fragments, budget, match=None: requests.post(api, timeout=5).json())
+        entry = PooledDriver(FakeDriver())
+        fetcher = XhrFetcher(SinglePool(entry))
+        assert fetcher.fetch_ads(server.market(source)) == dom_ads
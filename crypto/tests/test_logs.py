@@ -0,0 +1,18 @@
+import json
+import threading
+
+from p2p import logs
+
+
+def test_json_events_name_the_emitting_thread(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    logs.configure(level='INFO', json_path=str(path), console=False)
+    try:
+        worker = threading.Thread(target=lambda: logs.log("checked {}", 'PGK'), name='fetch-worker-3')
+        worker.start()
+        worker.join()
+        logs.flush()
+    finally:
+        logs.configure(json_path='', console=True)
+    events = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(event['msg'], event['thread']) for event in events] == [('checked PGK', 'fetch-worker-3')]
@@ -0,0 +1,43 @@
+import socket
+import threading
+import time
+
+from p2p.ads import Ad
+from p2p.fetchers import BYBIT, Market, RateFetcher
+from p2p.ratecache import CachedFetcher
+
+MARKET = Market(BYBIT, 'BUY', 'USDT', 'MYR', 'https://www.bybit.com/en/fiat/trade/otc/buy/USDT/MYR')
+
+
+class Direct(RateFetcher):
+    def fetch_ads(self, market, whitelist=None, limit=None):
+        return [Ad(price=4.5, advertiser='direct')]
+
+
+def test_stalled_daemon_falls_back_within_the_timeout():
+    # Accepts connections but never answers.
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+    accepted = []
+    threading.Thread(target=lambda: accepted.append(listener.accept()), daemon=True).start()
+    fetcher = CachedFetcher(f'http://127.0.0.1:{listener.getsockname()[1]}', fallback=Direct(), timeout=0.3)
+    try:
+        start = time.monotonic()
+        ads = fetcher.fetch_ads(MARKET)
+        assert [ad.advertiser for ad in ads] == ['direct']
+        assert time.monotonic() - start < 2
+    finally:
+        fetcher.close()
+        listener.close()
+
+
+def test_unreachable_daemon_falls_back():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    fetcher = CachedFetcher(f'http://127.0.0.1:{port}', fallback=Direct(), timeout=1)
+    try:
+        assert fetcher.fetch_ads(MARKET)[0].advertiser == 'direct'
+    finally:
+        fetcher.close()
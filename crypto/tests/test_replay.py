@@ -0,0 +1,40 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from p2p.replay import _sweep_vectorized, replay_ladder
+
+pytest.importorskip('numpy')
+
+LADDERS = [[(1.6, 15000), (1.8, 5000), (2.0, 10000)], [(1.5, 10000), (2.0, 20000)], [(1.0, 30000)]]
+
+
+def ts(day, hour, minute=0):
+    return datetime(2024, 5, day, hour, minute).timestamp()
+
+
+def assert_agree(timestamps, spreads):
+    swept = _sweep_vectorized(timestamps, spreads, LADDERS, 8)
+    for ladder, result in zip(LADDERS, swept):
+        reference = replay_ladder(timestamps, spreads, ladder, 8)
+        assert (result.alerts, result.volume, result.periods) == \
+            (reference.alerts, reference.volume, reference.periods)
+
+
+def test_gap_across_the_reset():
+    # Down from 09:00 on the 1st until 07:00 on the 3rd: no reset happens before 08:00 on the 3rd.
+    timestamps, spreads = [ts(1, 9), ts(3, 7)], [1.2, 1.2]
+    assert replay_ladder(timestamps, spreads, LADDERS[2], 8).alerts == 1
+    assert_agree(timestamps, spreads)
+
+
+def test_gappy_histories_agree_with_the_reference_replay():
+    rng = random.Random(7)
+    for _ in range(100):
+        now, timestamps, spreads = ts(1, 0), [], []
+        for _ in range(rng.randint(1, 60)):
+            now += rng.choice([60, 900, 3600, 6 * 3600, 30 * 3600, 50 * 3600])
+            timestamps.append(now)
+            spreads.append(round(rng.uniform(0.5, 2.5), 2))
+        assert_agree(timestamps, spreads)
@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_MS = 400
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import p2p.cli, p2p.monitor
+elapsed = time.perf_counter() - start
+print(json.dumps({'import_ms': elapsed * 1000, 'modules': sorted(sys.modules)}))
+"""
+
+
+def fresh_import():
+    output = subprocess.run([sys.executable, '-c', SCRIPT], capture_output=True, text=True, check=True,
+                            cwd=PACKAGE_ROOT).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_cli_and_monitor_import_without_heavy_modules():
+    modules = fresh_import()['modules']
+    for heavy in ('selenium', 'numpy'):
+        assert not [name for name in modules if name == heavy or name.startswith(heavy + '.')]
+
+
+def test_cli_and_monitor_import_within_budget():
+    # Best of three fresh interpreters, to ride out a cold disk cache.
+    assert min(fresh_import()['import_ms'] for _ in range(3)) < BUDGET_MS
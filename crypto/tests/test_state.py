@@ -0,0 +1,78 @@
+import os
+from datetime import datetime
+
+from p2p.ladder import LadderEngine
+from p2p.state import StateJournal
+
+LADDERS = {'default': [(1.0, 100), (1.8, 200), (2.0, 300)]}
+NOW = datetime(2024, 5, 1, 9, 0)
+
+
+def engine(path, markets):
+    ladders = LadderEngine(LADDERS)
+    for market in markets:
+        ladders.add_market(market, ['default'])
+    journal = StateJournal(str(path))
+    journal.restore(ladders)
+    ladders.on_change = journal.record
+    return ladders, journal
+
+
+def test_torn_line_does_not_swallow_the_next_entry(tmp_path):
+    path = tmp_path / 'state.json'
+    ladders, journal = engine(path, ['M'])
+    assert ladders.evaluate('M', 1.9, NOW)
+    journal.close()
+    with open(str(path) + '.journal', 'ab') as file:
+        file.write(b'{"market": "M", "ladder": "def')  # crash mid-write
+
+    ladders, journal = engine(path, ['M'])
+    assert ladders.markets['M']['default'].highest_alerted == 1.8
+    assert ladders.evaluate('M', 2.0, NOW)
+    journal.close()
+
+    ladders, journal = engine(path, ['M'])
+    assert ladders.markets['M']['default'].highest_alerted == 2.0
+    assert not ladders.evaluate('M', 2.0, NOW)
+    journal.close()
+
+
+def test_processes_sharing_a_state_file_keep_each_others_entries(tmp_path):
+    path = tmp_path / 'state.json'
+    first, first_journal = engine(path, ['A'])
+    second, second_journal = engine(path, ['B'])
+    first_journal.compact_every = second_journal.compact_every = 1
+    first.evaluate('A', 1.0, NOW)
+    first_journal.flush()
+    second.evaluate('B', 2.0, NOW)  # compacts the shared journal
+    second_journal.flush()
+    first.evaluate('A', 1.8, NOW)
+    first_journal.close()
+    second_journal.close()
+
+    restored, journal = engine(path, ['A', 'B'])
+    assert restored.markets['A']['default'].highest_alerted == 1.8
+    assert restored.markets['B']['default'].highest_alerted == 2.0
+    journal.close()
+
+
+def test_compaction_truncates_the_journal_where_directories_cannot_be_opened(tmp_path, monkeypatch):
+    path = tmp_path / 'state.json'
+    real_open = os.open
+
+    def open_no_directories(file, flags, *args, **kwargs):
+        if os.path.isdir(file):
+            raise PermissionError(13, 'Permission denied', file)  # as on Windows
+        return real_open(file, flags, *args, **kwargs)
+
+    monkeypatch.setattr(os, 'open', open_no_directories)
+    ladders, journal = engine(path, ['M'])
+    journal.compact_every = 1
+    ladders.evaluate('M', 1.9, NOW)
+    journal.close()
+    assert os.path.getsize(str(path) + '.journal') == 0
+    assert journal._journal_entries == 0
+
+    restored, journal = engine(path, ['M'])
+    assert restored.markets['M']['default'].highest_alerted == 1.8
+    journal.close()
@@ -0,0 +1,40 @@
+import os
+import struct
+from datetime import datetime, timezone
+
+from p2p.tickstore import RECORD, TickStore
+
+DAY = datetime(2024, 5, 1, tzinfo=timezone.utc).timestamp()
+
+
+def test_two_writers_share_market_ids_and_keep_segments_sorted(tmp_path):
+    binance, bybit = TickStore(str(tmp_path)), TickStore(str(tmp_path))
+    bybit.append('Bybit MYR/USDT sell alert', 'SELL', price=4.6, ts=DAY + 20)
+    binance.append('Binance PGK/USDT', 'SELL', price=4.1, ts=DAY + 10)  # behind the other writer
+    binance.append('Binance PGK/USDT', 'BUY', price=4.0, ts=DAY + 30)
+    bybit.append('Bybit MYR/USDT sell alert', 'SELL', price=4.7, ts=DAY + 40)
+    binance.close()
+    bybit.close()
+
+    reader = TickStore(str(tmp_path))
+    ticks = list(reader.scan(DAY, DAY + 3600))
+    assert [tick.ts for tick in ticks] == sorted(tick.ts for tick in ticks)
+    assert [(tick.market, tick.price) for tick in ticks] == [
+        ('Bybit MYR/USDT sell alert', 4.6), ('Binance PGK/USDT', 4.1),
+        ('Binance PGK/USDT', 4.0), ('Bybit MYR/USDT sell alert', 4.7)]
+    assert [tick.price for tick in bybit.scan(DAY, DAY + 3600, market='Binance PGK/USDT')] == [4.1, 4.0]
+
+
+def test_torn_record_is_cut_off_before_the_next_append(tmp_path):
+    store = TickStore(str(tmp_path))
+    store.append('M', 'SPREAD', spread=1.0, ts=DAY + 1)
+    store.close()
+    path = os.path.join(str(tmp_path), '2024-05-01.ticks')
+    with open(path, 'ab') as file:
+        file.write(struct.pack('<d', DAY + 2)[:5])  # crash mid-record
+
+    store = TickStore(str(tmp_path))
+    store.append('M', 'SPREAD', spread=2.0, ts=DAY + 3)
+    store.close()
+    assert os.path.getsize(path) == 2 * RECORD.size
+    assert [tick.spread for tick in store.scan(DAY, DAY + 10)] == [1.0, 2.0]
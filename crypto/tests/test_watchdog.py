@@ -0,0 +1,65 @@
+from p2p.watchdog import ProcessInfo, find_orphans, marker_owner, watchdog_switch
+
+SELF = 5000
+
+
+def table(*rows):
+    return {pid: ProcessInfo(pid, ppid, name, cmdline, 0) for pid, ppid, name, cmdline in rows}
+
+
+def chrome(pid, ppid, owner):
+    return pid, ppid, 'chrome', f'chrome --headless {watchdog_switch(owner)}'
+
+
+def test_marker_owner():
+    assert marker_owner('chrome --headless --p2p-watchdog=123 --no-sandbox') == 123
+    assert marker_owner('chrome --p2p-watchdog') == 0
+    assert marker_owner('chrome --headless') is None
+
+
+def test_standalone_chromedriver_service_is_not_ours():
+    processes = table(
+        (1, 0, 'systemd', '/sbin/init'),
+        (4444, 1, 'chromedriver', 'chromedriver --port=4444'),
+        (4450, 4444, 'chrome', 'chrome --headless'),
+    )
+    assert find_orphans(processes, self_pid=SELF) == []
+
+
+def test_orphaned_driver_under_a_subreaper_is_reaped():
+    # The monitor that started pid 200 (pid 100) died; tini adopted its chromedriver.
+    processes = table(
+        (1, 0, 'tini', 'tini -- python p2p_bot.py'),
+        (SELF, 1, 'python', 'python p2p_bot.py'),
+        (200, 1, 'chromedriver', 'chromedriver --port=0'),
+        chrome(201, 200, owner=100),
+        (202, 201, 'chrome', 'chrome --type=renderer'),
+    )
+    assert sorted(find_orphans(processes, self_pid=SELF)) == [200, 201]
+
+
+def test_drivers_of_live_owners_are_kept():
+    processes = table(
+        (1, 0, 'init', ''),
+        (SELF, 1, 'python', 'python p2p_bot.py'),
+        (300, 1, 'python', 'python binance_p2p.py'),
+        (301, 300, 'chromedriver', 'chromedriver'),
+        chrome(302, 301, owner=300),
+        (400, SELF, 'chromedriver', 'chromedriver'),  # in the pool
+        chrome(401, 400, owner=SELF),
+        (500, SELF, 'chromedriver', 'chromedriver'),  # still being created by this process
+        chrome(501, 500, owner=SELF),
+    )
+    assert find_orphans(processes, live_pids=[400], self_pid=SELF) == []
+
+
+def test_marked_chrome_without_a_driver():
+    processes = table(
+        (1, 0, 'init', ''),
+        (SELF, 1, 'python', 'python p2p_bot.py'),
+        (300, 1, 'python', 'python binance_p2p.py'),
+        chrome(601, 1, owner=SELF),   # its chromedriver died
+        chrome(602, 1, owner=100),    # owner gone
+        chrome(603, 1, owner=300),    # owner alive
+    )
+    assert sorted(find_orphans(processes, self_pid=SELF)) == [601, 602]